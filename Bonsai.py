@@ -3,12 +3,36 @@
 
 #import plotly.graph_objects as go
 from collections import deque
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from linguistics_support.articut_cache import ArticutCache
+from linguistics_support.timing import timed
+import os
+try:
+    import numpy as np
+except ImportError:
+    np = None
+# ARTICUT_CACHE_FILE = ""   => 不使用硬碟快取 (預設)
+# ARTICUT_CACHE_FILE = path => 把 Articut 的結果存在 SQLite 檔 path (見 linguistics_support/articut_cache.py)
+ARTICUT_CACHE_FILE = ""
+
+# Articut 與 Loki (merge) 都在第一次用到時才載入；只用到樹狀結構計算時不必付出這些 import 的成本
+articut = None
+def getArticut():
+    global articut
+    if articut is None:
+        from ArticutAPI import Articut
+        articut = Articut()
+        if ARTICUT_CACHE_FILE:
+            articut = ArticutCache(articut, cacheFILE=ARTICUT_CACHE_FILE)
+    return articut
+
+def askLokiMerge(content, **kwargs):
+    from Loki_Model.merge.main import askLoki
+    return askLoki(content, **kwargs)
 
-from ArticutAPI import Articut
-articut = Articut()
-
-from Loki_Model.merge.main import askLoki as askLokiMerge
 import re
 splitPAT = re.compile("(?<=>)(?=<)")
 posPAT = re.compile("(<)>")
@@ -17,7 +41,10 @@ purgePAT = re.compile("</?[a-zA-Z]+(_[a-zA-Z]+)?>")
 from pprint import pprint
 
 # ## 以 Graph 建立句法樹 ######################################
+# treeMaker / setMaker / algMaker 與 ccommandWith* 直接回傳結果。
+# 需要單次耗時時用 treeMaker.withTime(...)；要收集多次呼叫的耗時分佈時用 linguistics_support.timing.timing()。
 
+@timed
 def treeMaker(inputSentence):
     """
     input:
@@ -26,7 +53,6 @@ def treeMaker(inputSentence):
     return: 一個最簡化的右向二元樹
     {"node_1": {"w1", "node2"}, "node_2": {"w2", "node_3"},..."node_n-1": ,{"wn-1", "wn"}}
     """
-    startTime = datetime.now()
     wordLIST = [w for w in inputSentence.replace("w", " w").split(" ") if w != ""]
     #nodeLength = len(wordLIST) - 1
     treeDICT = {}
@@ -37,8 +63,7 @@ def treeMaker(inputSentence):
             treeDICT[f"node{i + 1}"] = {wordLIST[i], wordLIST[i+1]}
         else:
             treeDICT[f"node{i + 1}"] = {wordLIST[i], f"node{i + 2}"}
-    time = datetime.now() - startTime
-    return treeDICT, time
+    return treeDICT
 
 def findParentNode(tree, childnode):
     for parentnode in tree.keys():
@@ -46,13 +71,13 @@ def findParentNode(tree, childnode):
             return parentnode
     return childnode
 
+@timed
 def ccommandWithTree(tree, commander="w1", commandee=""):
     """
     計算 w1 是否 c-command 最後一個 wn
     input: tree : {'node9': {'w9', 'w10'}, 'node8': {'w8', 'node9'}, 'node7': {'node8', 'w7'}, 'node6': {'w6', 'node7'}, 'node5': {'w5', 'node6'}, 'node4': {'w4', 'node5'}, 'node3': {'w3', 'node4'}, 'node2': {'w2', 'node3'}, 'node1': {'w1', 'node2'}}
-    return: True/False, time
+    return: True/False
     """
-    startTime = datetime.now()
     #找到 commander 的 immediate dominating node
     for node in tree.keys():
         if commander in tree[node]:
@@ -72,8 +97,157 @@ def ccommandWithTree(tree, commander="w1", commandee=""):
         ccommand_result = True
     else:
         ccommand_result = False
-    time = datetime.now() - startTime
-    return ccommand_result, time
+    return ccommand_result
+
+
+def getWordKey(word):
+    """
+    排序用的鍵：w1, w2, ..., w10 依數字排列，其它名稱排在後面並依字串排列。
+    """
+    if word[1:].isdigit():
+        return (0, int(word[1:]), word)
+    return (1, 0, word)
+
+class TreeIndex:
+    """
+    由 treeMaker() 的結果 (或任何 {node: {child, ...}} 形式的樹) 一次建立的索引，
+    之後每次 dominance / c-command 查詢都是 O(1)，不必像 ccommandWithTree() 每次重新掃描所有節點。
+
+    每個節點給一個整數 id，並記錄：
+        parentLIST  : 父節點 id (根節點為 -1)
+        depthLIST   : 深度 (根節點為 0)
+        startLIST   : Euler tour 進入該節點的順序 (前序編號)
+        endLIST     : 該節點子樹中最後一個節點的前序編號
+    A dominates B  <=> startLIST[A] <= startLIST[B] <= endLIST[A]
+    """
+    def __init__(self, tree, root=None):
+        if root is None:
+            root = find_root(tree)
+        self.root = root
+        self.nodeLIST = []
+        self.idDICT = {}
+        self.parentLIST = []
+        self.depthLIST = []
+        self.startLIST = []
+        self.endLIST = []
+        if root is None:
+            return
+
+        # 子節點依「子樹中最前面的字」排列，前序編號因此與句中由左到右的順序一致
+        keyDICT = {}
+        stack = [(root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if node in keyDICT:
+                continue
+            if not tree.get(node):
+                keyDICT[node] = getWordKey(node)
+            elif visited:
+                keyDICT[node] = min(keyDICT[child] for child in tree[node])
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in tree[node] if child not in keyDICT)
+
+        # 以堆疊做前序走訪，深句子也不受遞迴深度限制
+        stack = [(root, -1, 0)]
+        while stack:
+            node, parentINT, depthINT = stack.pop()
+            if node in self.idDICT:
+                continue
+            idINT = len(self.nodeLIST)
+            self.idDICT[node] = idINT
+            self.nodeLIST.append(node)
+            self.parentLIST.append(parentINT)
+            self.depthLIST.append(depthINT)
+            self.startLIST.append(idINT)
+            self.endLIST.append(idINT)
+            if node in tree:
+                for child in sorted(tree[node], key=keyDICT.__getitem__, reverse=True):
+                    stack.append((child, idINT, depthINT + 1))
+
+        # 前序編號即 id；由後往前把子樹的最大編號回填給父節點
+        for idINT in range(len(self.nodeLIST) - 1, 0, -1):
+            parentINT = self.parentLIST[idINT]
+            if self.endLIST[idINT] > self.endLIST[parentINT]:
+                self.endLIST[parentINT] = self.endLIST[idINT]
+
+    @classmethod
+    def fromArrays(cls, nodeLIST, parentLIST, depthLIST, endLIST):
+        """
+        由已依前序排列的節點與其母節點、深度、子樹結尾直接建立索引 (例如 parseBracket() 邊讀邊算好的陣列)。
+        """
+        index = cls.__new__(cls)
+        index.root = nodeLIST[0] if nodeLIST else None
+        index.nodeLIST = nodeLIST
+        index.idDICT = {node: i for i, node in enumerate(nodeLIST)}
+        index.parentLIST = parentLIST
+        index.depthLIST = depthLIST
+        index.startLIST = list(range(len(nodeLIST)))
+        index.endLIST = endLIST
+        return index
+
+    def __len__(self):
+        return len(self.nodeLIST)
+
+    def __contains__(self, node):
+        return node in self.idDICT
+
+    def parent(self, node):
+        parentINT = self.parentLIST[self.idDICT[node]]
+        return self.nodeLIST[parentINT] if parentINT >= 0 else None
+
+    def depth(self, node):
+        return self.depthLIST[self.idDICT[node]]
+
+    def dominates(self, dominator, dominee):
+        a = self.idDICT[dominator]
+        b = self.idDICT[dominee]
+        return self.startLIST[a] <= self.startLIST[b] <= self.endLIST[a]
+
+    def ccommands(self, commander, commandee):
+        """
+        commander c-command commandee：兩者互不支配，且 commander 的母節點支配 commandee。
+
+        注意與 ccommandWithTree() / ccommandWithSet() / ccommandWithAlg() 不同：它們只檢查「commandee 在 commander 的母節點之下」，
+        所以 ccommandWithTree(tree, w, w) 為 True，commander 支配 commandee 時也為 True；
+        這裡採用上面的定義，ccommands(w, w) 為 False。ccommandDomain()、ccommandPairs() 與 ccommandMatrix() 都與這裡一致。
+        """
+        a = self.idDICT[commander]
+        b = self.idDICT[commandee]
+        p = self.parentLIST[a]
+        if a == b or p < 0:
+            return False
+        if self.startLIST[a] <= self.startLIST[b] <= self.endLIST[a]:
+            return False
+        # 母節點本身支配 commander，不在 c-command 範圍內
+        return self.startLIST[p] < self.startLIST[b] <= self.endLIST[p]
+
+    def ccommandDomain(self, commander):
+        """
+        回傳 commander c-command 的所有節點：母節點的子樹扣掉母節點本身與 commander 的子樹，
+        在前序排列中剛好是兩段連續區間。
+        """
+        a = self.idDICT[commander]
+        p = self.parentLIST[a]
+        if p < 0:
+            return []
+        return self.nodeLIST[p+1:self.startLIST[a]] + self.nodeLIST[self.endLIST[a]+1:self.endLIST[p]+1]
+
+    def ccommandPairs(self, nodeLIST=None):
+        """
+        批次查詢：依序產生所有 (commander, commandee) 的 c-command 組合。
+        nodeLIST 指定只看哪些節點 (例如只看葉節點)；預設為全部節點。
+        """
+        if nodeLIST is None:
+            for commander in self.nodeLIST:
+                for commandee in self.ccommandDomain(commander):
+                    yield commander, commandee
+        else:
+            nodeSET = set(nodeLIST)
+            for commander in nodeLIST:
+                for commandee in self.ccommandDomain(commander):
+                    if commandee in nodeSET:
+                        yield commander, commandee
 
 
 #建二元樹使用
@@ -88,79 +262,193 @@ def find_root(graph):
     return list(roots)[0] if roots else None
 
 #僅為建二元樹之視覺化時使用
-def calculate_positions(graph, root):
-    """Calculate x, y positions for each node with blue nodes at bottom, green nodes at right, rotated 45 degrees and horizontally flipped."""
-    import math
-
-    # BFS to assign levels
-    queue = deque([(root, 0)])
-    visited = set()
-    level_nodes = {}
-
-    while queue:
-        node, level = queue.popleft()
-        if node in visited:
-            continue
-        visited.add(node)
-
-        if level not in level_nodes:
-            level_nodes[level] = []
-        level_nodes[level].append(node)
-
-        if node in graph:
-            for child in sorted(graph[node]):
-                if child not in visited:
-                    queue.append((child, level + 1))
-
-    # Separate blue nodes (internal) and green nodes (leaf)
-    coords = {}
-    blue_nodes = []
-    green_nodes = []
-
-    for level, nodes in level_nodes.items():
-        for node in nodes:
-            if node in graph:
-                blue_nodes.append((node, level))
-            else:
-                green_nodes.append((node, level))
-
-    # Position blue nodes vertically (bottom of graph)
-    for idx, (node, level) in enumerate(blue_nodes):
-        x_orig = 5  # Center column
-        y_orig = -idx * 2  # Vertical spacing
-
-        # Rotate 45 degrees clockwise
-        angle = -math.pi / 4  # -45 degrees in radians
-        x_rotated = x_orig * math.cos(angle) - y_orig * math.sin(angle)
-        y_rotated = x_orig * math.sin(angle) + y_orig * math.cos(angle)
-
-        # Horizontal flip
-        x_flipped = -x_rotated
-
-        coords[node] = {
-            'x': x_flipped,
-            'y': y_rotated
-        }
-
-    # Position green nodes to the right
-    for idx, (node, level) in enumerate(green_nodes):
-        x_orig = 10  # Right side
-        y_orig = -idx * 2  # Vertical spacing
-
-        # Rotate 45 degrees clockwise
-        angle = -math.pi / 4  # -45 degrees in radians
-        x_rotated = x_orig * math.cos(angle) - y_orig * math.sin(angle)
-        y_rotated = x_orig * math.sin(angle) + y_orig * math.cos(angle)
-
-        # Horizontal flip
-        x_flipped = -x_rotated
-
-        coords[node] = {
-            'x': x_flipped,
-            'y': y_rotated
-        }
+class TreeLayout:
+    """
+    整齊樹 (tidy tree) 排版：Walker 演算法 (Buchheim, Jünger & Leipert 的線性時間版本)。
+    子樹之間至少相隔 siblingGap，母節點置於第一個與最後一個子節點的正中間，每層相隔 levelGap，根節點在最上方。
+    alignLeaf 為 True 時所有葉節點 (字) 依序等距排在最底層 (句法樹常見的畫法)，母節點一樣置中。
+
+    結果以 TreeIndex 的節點 id (前序) 為索引存成 NumPy 陣列：
+        xARRAY, yARRAY     : 節點座標
+        leafARRAY          : 是否為葉節點
+        segmentARRAY       : (邊數, 2, 2) 的線段陣列 [[母節點 x, y], [子節點 x, y]]
+        edgeXARRAY, edgeYARRAY : 以 NaN 分隔的折線座標，可直接交給繪圖程式
+    """
+    def __init__(self, inputOBJ, siblingGap=1.0, levelGap=1.0, alignLeaf=False):
+        if np is None:
+            raise ImportError("TreeLayout requires numpy.")
+        self.index = toTreeIndex(inputOBJ)
+        self.siblingGap = siblingGap
+        self.levelGap = levelGap
+        nodeINT = len(self.index)
+        parentARRAY = np.asarray(self.index.parentLIST, dtype=np.int64)
+        self.leafARRAY = np.asarray(self.index.endLIST, dtype=np.int64) == np.arange(nodeINT)
+        self.xARRAY = np.asarray(self._alignLeaf() if alignLeaf else self._walk(), dtype=np.float64)
+
+        depthARRAY = np.asarray(self.index.depthLIST, dtype=np.float64)
+        if alignLeaf and nodeINT:
+            depthARRAY[self.leafARRAY] = depthARRAY.max()
+        self.yARRAY = 0.0 - depthARRAY * levelGap
+
+        # 每個非根節點恰有一條連到母節點的邊
+        childARRAY = np.flatnonzero(parentARRAY >= 0)
+        fromARRAY = parentARRAY[childARRAY]
+        self.segmentARRAY = np.empty((len(childARRAY), 2, 2), dtype=np.float64)
+        self.segmentARRAY[:, 0, 0] = self.xARRAY[fromARRAY]
+        self.segmentARRAY[:, 0, 1] = self.yARRAY[fromARRAY]
+        self.segmentARRAY[:, 1, 0] = self.xARRAY[childARRAY]
+        self.segmentARRAY[:, 1, 1] = self.yARRAY[childARRAY]
+        self.edgeXARRAY = np.full(len(childARRAY) * 3, np.nan)
+        self.edgeYARRAY = np.full(len(childARRAY) * 3, np.nan)
+        self.edgeXARRAY[0::3] = self.segmentARRAY[:, 0, 0]
+        self.edgeXARRAY[1::3] = self.segmentARRAY[:, 1, 0]
+        self.edgeYARRAY[0::3] = self.segmentARRAY[:, 0, 1]
+        self.edgeYARRAY[1::3] = self.segmentARRAY[:, 1, 1]
+
+    def _alignLeaf(self):
+        parentLIST = self.index.parentLIST
+        xLIST = [0.0] * len(parentLIST)
+        firstLIST = [None] * len(parentLIST)
+        lastLIST = [None] * len(parentLIST)
+        leafINT = 0
+        for v in range(len(parentLIST)):
+            if self.index.endLIST[v] == v:
+                xLIST[v] = leafINT * self.siblingGap
+                leafINT += 1
+        # 反向前序：子節點都比母節點先處理完
+        for v in range(len(parentLIST) - 1, -1, -1):
+            if firstLIST[v] is not None:
+                xLIST[v] = (firstLIST[v] + lastLIST[v]) / 2
+            p = parentLIST[v]
+            if p >= 0:
+                firstLIST[p] = xLIST[v]
+                if lastLIST[p] is None:
+                    lastLIST[p] = xLIST[v]
+        return xLIST
+
+    def _walk(self):
+        realINT = len(self.index.parentLIST)
+        if realINT == 0:
+            return []
+        # 最後加一個虛擬的根節點，把所有根節點 (通常只有一個) 當作它的子節點一起排
+        rootINT = realINT
+        parentLIST = [rootINT if p < 0 else p for p in self.index.parentLIST] + [-1]
+        nodeINT = realINT + 1
+        childLIST = [[] for _ in range(nodeINT)]
+        numberLIST = [0] * nodeINT        # 在兄弟節點中的位置
+        for v in range(realINT):
+            numberLIST[v] = len(childLIST[parentLIST[v]])
+            childLIST[parentLIST[v]].append(v)
+
+        prelimLIST = [0.0] * nodeINT
+        modLIST = [0.0] * nodeINT
+        shiftLIST = [0.0] * nodeINT
+        changeLIST = [0.0] * nodeINT
+        threadLIST = [-1] * nodeINT
+        ancestorLIST = list(range(nodeINT))
+        defaultAncestorLIST = [c[0] if c else -1 for c in childLIST]
+        gapFLOAT = self.siblingGap
+
+        def leftSibling(v):
+            p = parentLIST[v]
+            return childLIST[p][numberLIST[v] - 1] if p >= 0 and numberLIST[v] > 0 else -1
+
+        def nextLeft(v):
+            return childLIST[v][0] if childLIST[v] else threadLIST[v]
+
+        def nextRight(v):
+            return childLIST[v][-1] if childLIST[v] else threadLIST[v]
+
+        def apportion(v, defaultAncestor):
+            w = leftSibling(v)
+            if w < 0:
+                return defaultAncestor
+            vip = vop = v
+            vim = w
+            vom = childLIST[parentLIST[v]][0]
+            sip = modLIST[vip]
+            sop = modLIST[vop]
+            sim = modLIST[vim]
+            som = modLIST[vom]
+            while nextRight(vim) >= 0 and nextLeft(vip) >= 0:
+                vim = nextRight(vim)
+                vip = nextLeft(vip)
+                vom = nextLeft(vom)
+                vop = nextRight(vop)
+                ancestorLIST[vop] = v
+                shiftFLOAT = (prelimLIST[vim] + sim) - (prelimLIST[vip] + sip) + gapFLOAT
+                if shiftFLOAT > 0:
+                    a = ancestorLIST[vim] if parentLIST[ancestorLIST[vim]] == parentLIST[v] else defaultAncestor
+                    subtreeINT = numberLIST[v] - numberLIST[a]
+                    changeLIST[v] -= shiftFLOAT / subtreeINT
+                    shiftLIST[v] += shiftFLOAT
+                    changeLIST[a] += shiftFLOAT / subtreeINT
+                    prelimLIST[v] += shiftFLOAT
+                    modLIST[v] += shiftFLOAT
+                    sip += shiftFLOAT
+                    sop += shiftFLOAT
+                sim += modLIST[vim]
+                sip += modLIST[vip]
+                som += modLIST[vom]
+                sop += modLIST[vop]
+            if nextRight(vim) >= 0 and nextRight(vop) < 0:
+                threadLIST[vop] = nextRight(vim)
+                modLIST[vop] += sim - sop
+            if nextLeft(vip) >= 0 and nextLeft(vom) < 0:
+                threadLIST[vom] = nextLeft(vip)
+                modLIST[vom] += sip - som
+                defaultAncestor = v
+            return defaultAncestor
+
+        # 後序走訪 (由左到右)：每個節點的子樹排好後，立刻與左邊已排好的兄弟子樹靠攏
+        stack = [(rootINT, False)]
+        while stack:
+            v, visited = stack.pop()
+            if not visited:
+                stack.append((v, True))
+                stack.extend((c, False) for c in reversed(childLIST[v]))
+                continue
+            w = leftSibling(v)
+            if childLIST[v]:
+                shiftFLOAT = changeFLOAT = 0.0
+                for c in reversed(childLIST[v]):
+                    prelimLIST[c] += shiftFLOAT
+                    modLIST[c] += shiftFLOAT
+                    changeFLOAT += changeLIST[c]
+                    shiftFLOAT += shiftLIST[c] + changeFLOAT
+                midFLOAT = (prelimLIST[childLIST[v][0]] + prelimLIST[childLIST[v][-1]]) / 2
+                if w >= 0:
+                    prelimLIST[v] = prelimLIST[w] + gapFLOAT
+                    modLIST[v] = prelimLIST[v] - midFLOAT
+                else:
+                    prelimLIST[v] = midFLOAT
+            elif w >= 0:
+                prelimLIST[v] = prelimLIST[w] + gapFLOAT
+            p = parentLIST[v]
+            if p >= 0:
+                defaultAncestorLIST[p] = apportion(v, defaultAncestorLIST[p])
+
+        # 前序編號中母節點一定在子節點之前，一次掃過即可把祖先的 mod 累加下來
+        modSumLIST = [0.0] * nodeINT
+        modSumLIST[rootINT] = modLIST[rootINT]
+        xLIST = [0.0] * realINT
+        for v in range(realINT):
+            p = parentLIST[v]
+            xLIST[v] = prelimLIST[v] + modSumLIST[p]
+            modSumLIST[v] = modSumLIST[p] + modLIST[v]
+        minFLOAT = min(xLIST)
+        return [x - minFLOAT for x in xLIST]
+
+    def getCoords(self):
+        """
+        return: {node: {'x': x, 'y': y}}，與原本 calculate_positions() 的格式相同
+        """
+        return {node: {'x': float(self.xARRAY[i]), 'y': float(self.yARRAY[i])} for i, node in enumerate(self.index.nodeLIST)}
 
-    return coords
+#僅為建二元樹之視覺化時使用
+def calculate_positions(graph, root):
+    """Calculate x, y positions for each node with a tidy-tree (Walker) layout; see TreeLayout."""
+    return TreeLayout(TreeIndex(graph, root)).getCoords()
 
 #僅為建二元樹之視覺化時使用
 def build_edges(graph, coords):
@@ -194,24 +482,17 @@ def visualize_tree(tree, title="Tree Structure Visualization"):
         print("No root node found!")
         return
 
-    coords = calculate_positions(tree, root)
-    edge_x, edge_y = build_edges(tree, coords)
+    import plotly.graph_objects as go
+
+    layout = TreeLayout(TreeIndex(tree, root))
+    edge_x, edge_y = layout.edgeXARRAY, layout.edgeYARRAY
 
     # Prepare node data
-    node_x = []
-    node_y = []
-    node_text = []
-    node_colors = []
-
-    for node in coords:
-        node_x.append(coords[node]['x'])
-        node_y.append(coords[node]['y'])
-        node_text.append(node)
-        # Color leaf nodes (not in graph keys) differently
-        if node in tree:
-            node_colors.append('#60A5FA')  # Blue for internal nodes
-        else:
-            node_colors.append('#34D399')  # Green for leaf nodes
+    node_x = layout.xARRAY
+    node_y = layout.yARRAY
+    node_text = layout.index.nodeLIST
+    # Color leaf nodes (not in graph keys) differently
+    node_colors = np.where(layout.leafARRAY, '#34D399', '#60A5FA')  # Green for leaf nodes, blue for internal nodes
 
     # Create edge trace
     edge_trace = go.Scatter(
@@ -258,58 +539,145 @@ def visualize_tree(tree, title="Tree Structure Visualization"):
 
 
 # ## 以 SET 建立句法樹 ######################################
-def setMaker(inputSentence):
+class SetStore:
+    """
+    setMaker() 使用的 hash-consing 集合庫：內容相同的成分 (frozenset) 只保留一個物件。
+    每個成分涵蓋的字以 bitmask 表示，第一次查詢時才計算並快取；
+    每棵樹「字 => 直接包含它的成分」的對照也只在第一次查詢時走訪一次。
+    之後同一棵樹上的 c-command 查詢都不必再攤平整個巢狀集合。
+
+    這些對照表都只是快取：每個表最多保留 maxEntryINT 筆，超過時丟掉最早加入的，之後需要時再重新計算；
+    字的 bit 位置超過 maxEntryINT 個時，位置與 bitmask 一起重新編號。所以長時間執行也不會無限制地佔用記憶體。
+    """
+    def __init__(self, maxEntryINT=100000):
+        self.maxEntryINT = maxEntryINT
+        self.internDICT = {}
+        self.bitDICT = {}          # 字 => bit 位置
+        self.maskDICT = {}         # 成分 => 涵蓋的字的 bitmask
+        self.containerDICT = {}    # 樹根 => {字: 直接包含它的成分}
+
+    def _trim(self, cacheDICT):
+        # dict 依加入順序排列，超過上限時由最早加入的開始丟
+        while len(cacheDICT) > self.maxEntryINT:
+            del cacheDICT[next(iter(cacheDICT))]
+
+    def intern(self, node):
+        internedNode = self.internDICT.get(node)
+        if internedNode is None:
+            internedNode = self.internDICT[node] = node
+            self._trim(self.internDICT)
+        return internedNode
+
+    def getBit(self, leaf, add=False):
+        bitINT = self.bitDICT.get(leaf)
+        if bitINT is None:
+            if not add:
+                return 0
+            bitINT = self.bitDICT[leaf] = len(self.bitDICT)
+        return 1 << bitINT
+
+    def getLeafMask(self, node):
+        maskINT = self.maskDICT.get(node)
+        if maskINT is not None:
+            return maskINT
+        if len(self.bitDICT) >= self.maxEntryINT:
+            self.bitDICT.clear()
+            self.maskDICT.clear()
+        # 後序走訪；已快取的成分 (包括與其它樹共用的子成分) 不再往下走。走訪途中不丟快取，結束後才修剪
+        stack = [(node, False)]
+        while stack:
+            current, visited = stack.pop()
+            if current in self.maskDICT:
+                continue
+            if visited:
+                maskINT = 0
+                for item in current:
+                    if isinstance(item, frozenset):
+                        maskINT |= self.maskDICT[item]
+                    else:
+                        maskINT |= self.getBit(item, add=True)
+                self.maskDICT[current] = maskINT
+            else:
+                stack.append((current, True))
+                stack.extend((item, False) for item in current if isinstance(item, frozenset))
+        maskINT = self.maskDICT[node]
+        self._trim(self.maskDICT)
+        return maskINT
+
+    def getLeafSet(self, node):
+        maskINT = self.getLeafMask(node)
+        return frozenset(leaf for leaf, bitINT in self.bitDICT.items() if maskINT >> bitINT & 1)
+
+    def getContainer(self, root, leaf):
+        """
+        return: root 這棵樹裡直接包含 leaf 的成分；不在樹裡則為 None
+        """
+        leafDICT = self.containerDICT.get(root)
+        if leafDICT is None:
+            leafDICT = self.containerDICT[root] = {}
+            stack = [root]
+            while stack:
+                current = stack.pop()
+                for item in current:
+                    if isinstance(item, frozenset):
+                        stack.append(item)
+                    else:
+                        leafDICT[item] = current
+            self._trim(self.containerDICT)
+        return leafDICT.get(leaf)
+
+    def clear(self):
+        self.internDICT.clear()
+        self.bitDICT.clear()
+        self.maskDICT.clear()
+        self.containerDICT.clear()
+
+setStore = SetStore()
+
+@timed
+def setMaker(inputSentence, store=None):
     """
     input:
     inputSentence: "w1w2w3w4...wn"，為一個由 word w 組成的字串，其後的數字表示它是第幾個字。
+    store: 放置成分的 SetStore，預設為 setStore
 
     return: 一個最簡化的右向二元素的集合
     {"w1", {"w2", {"w3", "w4"...}}}
     """
-    startTime = datetime.now()
+    if store is None:
+        store = setStore
     wordLIST = [w for w in inputSentence.replace("w", " w").split(" ") if w != ""]
-    workLIST = wordLIST[:]
     result = set()
-    for i in range(len(wordLIST) - 1, -1, -1):
-        if i == len(wordLIST) - 1:
-            pass
-        else:
-            workspaceSET = frozenset({workLIST[i], workLIST[i+1]})
-            workLIST.insert(i, workspaceSET)
-            if i == 0:
-                result.add(workspaceSET)
-    time = datetime.now() - startTime
-    return result, time
-
-def ccommandWithSet(inputSET, commander="w1", commandee=""):
-    startTime = datetime.now()
-    for i in inputSET:
-        for j in i:
-            if j == commander:
-                domainSet = j
-
-    stack = [domainSet]
-    workingSET = set()
-
-    while stack:
-        current = stack.pop()
-        for item in current:
-            if isinstance(item, frozenset):
-                stack.append(item)
-            else:
-                workingSET.add(item)
-
-    if commander in workingSET:
-        ccommand_result = True
-    else:
-        ccommand_result = False
-    time = datetime.now() - startTime
-    return ccommand_result, time
+    if len(wordLIST) > 1:
+        # 由右往左逐層包起來，每層 O(1)
+        workspaceSET = wordLIST[-1]
+        for word in reversed(wordLIST[:-1]):
+            workspaceSET = store.intern(frozenset({word, workspaceSET}))
+        result.add(workspaceSET)
+    return result
+
+@timed
+def ccommandWithSet(inputSET, commander="w1", commandee="", store=None):
+    """
+    計算 commander 是否 c-command commandee：commandee 在直接包含 commander 的成分裡。
+    input:
+    inputSET: setMaker() 的結果
+    store: 快取用的 SetStore，預設為 setStore
 
+    return: True/False
+    """
+    if store is None:
+        store = setStore
+    for root in inputSET:
+        domainSet = store.getContainer(root, commander)
+        if domainSet is not None:
+            return bool(store.getLeafMask(domainSet) & store.getBit(commandee))
+    return False
 
 
 
 # ## 以 Constituent Algebra 建立句法樹 ######################################
+@timed
 def algMaker(inputSentence):
     """
     input:
@@ -318,7 +686,6 @@ def algMaker(inputSentence):
     return: 一個最簡化的右向線性函式的集合，每個字 word 以 w 指代；每個 BASE 以 B 指代
     {"+".join(w1B1, w2B2, w3B3, ...wnBn), "+".join(w1B1, w2B2, w3B3, ...wn-1Bn-1), "+".join(w1B1, w2B2, w3B3, ...wn-2Bn-2)}
     """
-    startTime = datetime.now()
     wordLIST = [w for w in inputSentence.replace("w", " w").split(" ") if w != ""]
     workLIST = []
     result = dict()
@@ -332,32 +699,844 @@ def algMaker(inputSentence):
             result[wordLIST[i]] = algset
 
 
-    time = datetime.now() - startTime
-    return result, time
+    return result
 
+class AlgebraMask:
+    """
+    Constituent Algebra 的 bitmask 版本：每個符號 (wi、Bi、+) 對應一個 bit，
+    每個字對應的成分以一個 int 表示，n 個字的句子約需 n²/64 個 64-bit word，交集只要一次 AND。
+    用法與 algMaker() 的 dict 相同：algMask[word] 取得成分，ccommandWithAlg() 也直接接受。
+    constituentSET 另外記錄沒有直屬字的成分 (例如 ((a, b), (c, d)) 的整句)，toTreeIndex() 才能還原整棵樹。
+    """
+    def __init__(self):
+        self.bitDICT = {}     # 符號 => bit 位置
+        self.maskDICT = {}    # 字 => 成分的 bitmask
+        self.constituentSET = set()    # 其它成分的 bitmask
+
+    @classmethod
+    def fromDICT(cls, inputDICT):
+        """
+        由 algMaker() 形式的 {字: {符號, ...}} 轉換。
+        """
+        algMask = cls()
+        for word, algSET in inputDICT.items():
+            algMask.maskDICT[word] = algMask.toMask(algSET, add=True)
+        return algMask
+
+    def getBit(self, symbol, add=False):
+        bitINT = self.bitDICT.get(symbol)
+        if bitINT is None:
+            if not add:
+                return 0
+            bitINT = self.bitDICT[symbol] = len(self.bitDICT)
+        return 1 << bitINT
+
+    def toMask(self, symbolSET, add=False):
+        if isinstance(symbolSET, int):
+            return symbolSET
+        if isinstance(symbolSET, str):
+            return self.getBit(symbolSET, add)
+        maskINT = 0
+        for symbol in symbolSET:
+            maskINT |= self.getBit(symbol, add)
+        return maskINT
+
+    def toSet(self, maskINT):
+        return {symbol for symbol, bitINT in self.bitDICT.items() if maskINT >> bitINT & 1}
+
+    def __getitem__(self, word):
+        return self.maskDICT[word]
+
+    def __contains__(self, word):
+        return word in self.maskDICT
+
+    def __len__(self):
+        return len(self.maskDICT)
+
+    def __iter__(self):
+        return iter(self.maskDICT)
+
+    def items(self):
+        return self.maskDICT.items()
+
+    def getConstituentLIST(self):
+        """
+        所有成分 (字對應的成分與 constituentSET) 的 SET 形式，不重複。
+        """
+        maskLIST = list(dict.fromkeys(chain(self.maskDICT.values(), sorted(self.constituentSET))))
+        return [self.toSet(maskINT) for maskINT in maskLIST]
+
+@timed
+def algMaskMaker(inputSentence):
+    """
+    與 algMaker() 相同的輸入與結構，但回傳 AlgebraMask。
+    由右往左累積：每個字的成分 = 自己的 wi、Bi、+ 再 OR 上右邊成分的 bitmask。
+    """
+    wordLIST = [w for w in inputSentence.replace("w", " w").split(" ") if w != ""]
+    result = AlgebraMask()
+    if not wordLIST:
+        return result
+    plusINT = result.getBit("+", add=True)
+    maskINT = result.getBit(wordLIST[-1], add=True) | result.getBit(f"B{len(wordLIST)}", add=True)
+    for i in range(len(wordLIST) - 2, -1, -1):
+        maskINT |= result.getBit(wordLIST[i], add=True) | result.getBit(f"B{i+1}", add=True) | plusINT
+        result.maskDICT[wordLIST[i]] = maskINT
+    return result
+
+@timed
 def ccommandWithAlg(inputDICT, commander="w1", commandee=""):
-    startTime = datetime.now()
+    """
+    input:
+    inputDICT: algMaker() 或 algMaskMaker() 的結果
+    commandee: 符號的集合 (例如 {"w10"})；inputDICT 為 AlgebraMask 時也可以是 bitmask
+
+    return: True/False
+    """
     result = False
 
-    if commandee & inputDICT[commander]:
+    if isinstance(inputDICT, AlgebraMask):
+        if inputDICT.toMask(commandee) & inputDICT[commander]:
+            result = True
+    elif commandee & inputDICT[commander]:
         result = True
-    time = datetime.now() - startTime
-    return result, time
+    return result
+
+
+
+
+
+# ## c-command 矩陣 (向量化) ######################################
+def setToTree(inputSET):
+    """
+    把 setMaker() 的結果 {frozenset({"w1", frozenset({"w2", ...})})} 轉成 treeMaker() 的 {node: {child, ...}} 形式。
+    """
+    treeDICT = {}
+    rootLIST = [s for s in inputSET if isinstance(s, frozenset)] if not isinstance(inputSET, frozenset) else [inputSET]
+    queue = deque((s, f"node{i+1}") for i, s in enumerate(rootLIST))
+    countINT = len(rootLIST)
+    while queue:
+        currentSET, nodeSTR = queue.popleft()
+        treeDICT[nodeSTR] = set()
+        for item in currentSET:
+            if isinstance(item, frozenset):
+                countINT += 1
+                childSTR = f"node{countINT}"
+                queue.append((item, childSTR))
+                treeDICT[nodeSTR].add(childSTR)
+            else:
+                treeDICT[nodeSTR].add(item)
+    return treeDICT
+
+def algToTree(inputDICT):
+    """
+    把 algMaker() 的結果 {"w1": {"w1", "B1", "+", "w2", ...}, ...} 轉成 treeMaker() 的形式。
+    每個 value 是一個成分所涵蓋的字 (inputDICT 也可以直接是成分的 list)；相同的成分只算一次，
+    各成分依涵蓋的字數由大到小排列，每個成分 (以及每個字) 的母節點就是涵蓋它的最小成分。
+    """
+    algLIST = inputDICT.values() if isinstance(inputDICT, dict) else inputDICT
+    nodeLIST = list(dict.fromkeys(frozenset(a for a in algSET if a.startswith("w")) for algSET in algLIST))
+    nodeLIST.sort(key=len, reverse=True)
+
+    treeDICT = {f"node{i+1}": set() for i in range(len(nodeLIST))}
+    ownerDICT = {}    # 字 => 目前涵蓋它的最小成分 (nodeLIST 的 index)
+    for i, wordSET in enumerate(nodeLIST):
+        parentLIST = [ownerDICT[w] for w in wordSET if w in ownerDICT]
+        if parentLIST:
+            treeDICT[f"node{max(parentLIST)+1}"].add(f"node{i+1}")
+        for w in wordSET:
+            ownerDICT[w] = i
+    for w, i in ownerDICT.items():
+        treeDICT[f"node{i+1}"].add(w)
+    return treeDICT
+
+def toTreeIndex(inputOBJ):
+    """
+    接受 TreeIndex、ParsedTree、treeMaker()、setMaker()、algMaker() 或 algMaskMaker() 的結果 (含 withTime() 回傳的 (result, time) tuple)，回傳 TreeIndex。
+    """
+    if isinstance(inputOBJ, TreeIndex):
+        return inputOBJ
+    if isinstance(inputOBJ, ParsedTree):
+        return inputOBJ.index
+    if isinstance(inputOBJ, tuple):
+        inputOBJ = inputOBJ[0]
+    if isinstance(inputOBJ, (set, frozenset)):
+        return TreeIndex(setToTree(inputOBJ))
+    if isinstance(inputOBJ, AlgebraMask):
+        return TreeIndex(algToTree(inputOBJ.getConstituentLIST()))
+    if inputOBJ and all(isinstance(v, (set, frozenset)) and not k.startswith("node") for k, v in inputOBJ.items()):
+        return TreeIndex(algToTree(inputOBJ))
+    return TreeIndex(inputOBJ)
+
+def getLeafLIST(index):
+    """
+    TreeIndex 裡的所有葉節點 (字)，依 w1, w2, ... 的順序排列。
+    """
+    leafLIST = [n for i, n in enumerate(index.nodeLIST) if index.endLIST[i] == i]
+    return sorted(leafLIST, key=getWordKey)
+
+def _getIntervalArray(index, nodeLIST):
+    idARRAY = np.fromiter((index.idDICT[n] for n in nodeLIST), dtype=np.int64, count=len(nodeLIST))
+    startARRAY = np.asarray(index.startLIST, dtype=np.int64)
+    endARRAY = np.asarray(index.endLIST, dtype=np.int64)
+    parentARRAY = np.asarray(index.parentLIST, dtype=np.int64)
+    if len(nodeLIST) == 0:
+        emptyARRAY = np.zeros(0, dtype=np.int64)
+        return emptyARRAY, emptyARRAY, emptyARRAY, emptyARRAY
+    parentIdARRAY = parentARRAY[idARRAY]
+    hasParentARRAY = parentIdARRAY >= 0
+    safeParentARRAY = np.where(hasParentARRAY, parentIdARRAY, 0)
+    # 沒有母節點的 (根節點) 給一個空區間，不 c-command 任何節點
+    parentStartARRAY = np.where(hasParentARRAY, startARRAY[safeParentARRAY], 0)
+    parentEndARRAY = np.where(hasParentARRAY, endARRAY[safeParentARRAY], -1)
+    return startARRAY[idARRAY], endARRAY[idARRAY], parentStartARRAY, parentEndARRAY
+
+def _ccommandFromInterval(startARRAY, endARRAY, parentStartARRAY, parentEndARRAY):
+    # 最後兩個維度是 (commander, commandee)；前面的維度 (批次) 照樣廣播
+    commandeeStartARRAY = startARRAY[..., None, :]
+    insideParentARRAY = (parentStartARRAY[..., :, None] < commandeeStartARRAY) & (commandeeStartARRAY <= parentEndARRAY[..., :, None])
+    insideSelfARRAY = (startARRAY[..., :, None] <= commandeeStartARRAY) & (commandeeStartARRAY <= endARRAY[..., :, None])
+    return insideParentARRAY & ~insideSelfARRAY
+
+def ccommandMatrix(inputOBJ, nodeLIST=None, packed=False):
+    """
+    一次算出所有字組 (或指定節點組) 之間的 c-command 關係。
+    input:
+    inputOBJ: treeMaker()、setMaker()、algMaker() 的結果或 TreeIndex
+    nodeLIST: 要比較的節點，預設為依順序排列的所有字 (w1...wn)
+    packed: True 時以 numpy.packbits() 壓縮最後一個維度 (每列 ceil(n/8) 個 byte)
+
+    return: (matrix, nodeLIST)，matrix[i, j] 為 nodeLIST[i] 是否 c-command nodeLIST[j]
+            (定義同 TreeIndex.ccommands()，所以對角線都是 False)
+    """
+    if np is None:
+        raise ImportError("ccommandMatrix() requires numpy.")
+    index = toTreeIndex(inputOBJ)
+    if nodeLIST is None:
+        nodeLIST = getLeafLIST(index)
+    matrix = _ccommandFromInterval(*_getIntervalArray(index, nodeLIST))
+    if packed:
+        matrix = np.packbits(matrix, axis=-1)
+    return matrix, nodeLIST
+
+def ccommandMatrixBatch(inputLIST, packed=False):
+    """
+    ccommandMatrix() 的批次版本：多個句子補齊到最長的句子後放進同一個陣列一起計算。
+    input:
+    inputLIST: 多個 treeMaker()、setMaker()、algMaker() 的結果或 TreeIndex (可混用)
+    packed: 同 ccommandMatrix()
+
+    return: (matrix, lengthARRAY, nodeLIST)
+        matrix 的形狀為 (句數, n, n)，n 為最長句子的字數；補齊的部分皆為 False
+        lengthARRAY 為各句的字數，nodeLIST 為各句依序排列的字
+    """
+    if np is None:
+        raise ImportError("ccommandMatrixBatch() requires numpy.")
+    indexLIST = [toTreeIndex(i) for i in inputLIST]
+    nodeLIST = [getLeafLIST(index) for index in indexLIST]
+    lengthARRAY = np.fromiter((len(n) for n in nodeLIST), dtype=np.int64, count=len(nodeLIST))
+    maxINT = int(lengthARRAY.max()) if len(lengthARRAY) else 0
 
+    # 補齊的位置：commandee 的區間起點為 -1，不落在任何母節點區間；commander 的母節點區間為空
+    startARRAY = np.full((len(indexLIST), maxINT), -1, dtype=np.int64)
+    endARRAY = np.full((len(indexLIST), maxINT), -1, dtype=np.int64)
+    parentStartARRAY = np.zeros((len(indexLIST), maxINT), dtype=np.int64)
+    parentEndARRAY = np.full((len(indexLIST), maxINT), -1, dtype=np.int64)
+    for i, index in enumerate(indexLIST):
+        lengthINT = lengthARRAY[i]
+        startARRAY[i, :lengthINT], endARRAY[i, :lengthINT], parentStartARRAY[i, :lengthINT], parentEndARRAY[i, :lengthINT] = _getIntervalArray(index, nodeLIST[i])
 
+    matrix = _ccommandFromInterval(startARRAY, endARRAY, parentStartARRAY, parentEndARRAY)
+    if packed:
+        matrix = np.packbits(matrix, axis=-1)
+    return matrix, lengthARRAY, nodeLIST
 
 
 
+
+# ## merge 流程使用的結構化成分 (constituent) ######################################
+leafPAT = re.compile("^<([^<>]+)>(.*)</\\1>$", re.S)
+tagIDDICT = {}
+tagLIST = []
+
+def getTagID(tagSTR):
+    """
+    將 POS 標記 (例如 "ENTITY_noun") 轉為整數 id。同一個標記永遠拿到同一個 id。
+    """
+    if tagSTR not in tagIDDICT:
+        tagIDDICT[tagSTR] = len(tagLIST)
+        tagLIST.append(tagSTR)
+    return tagIDDICT[tagSTR]
+
+# 序列化結果不超過 EDGE_SIZE 個字元的成分直接以字串表示；Constituent 節點記下開頭/結尾各 EDGE_SIZE 個字元
+EDGE_SIZE = 256
+
+class Constituent:
+    """
+    merge()/link()/EP()/CLP()/VP() 所操作的句法成分。
+    葉節點記錄 POS 標記 id 與文字；非葉節點只記錄左右兩個子節點的參照。
+    只有在 str() 時才會序列化成原本的 "(<ENTITY_noun>女孩</ENTITY_noun>, <ACTION_verb>坐</ACTION_verb>)" 格式。
+    子節點也可能是空字串 ""：那是各合併函式用來標記「已被合併」的佔位，序列化時照原樣輸出。
+
+    各合併函式以 joinConstituent() 合併兩個成分：合併結果不超過 EDGE_SIZE 個字元時仍是一般字串，規則比對直接用 str 的
+    startswith()/endswith()；超過時才建立 Constituent 節點，所以每次合併最多複製 EDGE_SIZE 個字元，
+    不必一再複製整串越長越深的括號字串。
+    節點建立時就由子節點算好序列化結果的開頭與結尾 (headSTR / tailSTR，各最多 EDGE_SIZE 個字元) 與總長度 sizeINT，
+    startswith()/endswith() 只看這些欄位，不必走整棵樹。
+    """
+    __slots__ = ("tagID", "text", "left", "right", "headSTR", "tailSTR", "sizeINT")
+
+    def __init__(self, left=None, right=None, tagID=-1, text=""):
+        self.tagID = tagID
+        self.text = text
+        self.left = left
+        self.right = right
+        if left is None and right is None:
+            leafSTR = self.leafSTR()
+            self.headSTR = leafSTR[:EDGE_SIZE]
+            self.tailSTR = leafSTR[-EDGE_SIZE:]
+            self.sizeINT = len(leafSTR)
+            return
+        # 序列化結果為 "(" + left + ", " + right + ")"；子節點的 headSTR/tailSTR 不完整時，長度必為 EDGE_SIZE
+        leftHeadSTR, leftTailSTR, leftSizeINT = _edgeOf(left)
+        rightHeadSTR, rightTailSTR, rightSizeINT = _edgeOf(right)
+        headSTR = "(" + leftHeadSTR
+        if leftSizeINT == len(leftHeadSTR) and len(headSTR) < EDGE_SIZE:
+            headSTR = headSTR + ", " + rightHeadSTR
+            if rightSizeINT == len(rightHeadSTR):
+                headSTR = headSTR + ")"
+        tailSTR = rightTailSTR + ")"
+        if rightSizeINT == len(rightTailSTR) and len(tailSTR) < EDGE_SIZE:
+            tailSTR = leftTailSTR + ", " + tailSTR
+            if leftSizeINT == len(leftTailSTR):
+                tailSTR = "(" + tailSTR
+        self.headSTR = headSTR[:EDGE_SIZE]
+        self.tailSTR = tailSTR[-EDGE_SIZE:]
+        self.sizeINT = leftSizeINT + rightSizeINT + 4
+
+    @classmethod
+    def fromToken(cls, tokenSTR):
+        """
+        由 Articut 的單一 result_pos 片段 (例如 "<ENTITY_noun>女孩</ENTITY_noun>") 建立葉節點。
+        無法辨識標記的片段以 tagID = -1 保留原文。
+        """
+        leaf = leafPAT.match(tokenSTR)
+        if leaf:
+            return cls(tagID=getTagID(leaf.group(1)), text=leaf.group(2))
+        return cls(text=tokenSTR)
+
+    def isLeaf(self):
+        return self.left is None and self.right is None
+
+    def tag(self):
+        return tagLIST[self.tagID] if self.tagID >= 0 else ""
+
+    def leafSTR(self):
+        if self.tagID < 0:
+            return self.text
+        tagSTR = tagLIST[self.tagID]
+        return f"<{tagSTR}>{self.text}</{tagSTR}>"
+
+    def pieces(self):
+        """
+        依序產生序列化後的字串片段。以堆疊展開，不受遞迴深度限制。
+        """
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if type(item) == str:
+                yield item
+            elif item.isLeaf():
+                yield item.leafSTR()
+            else:
+                stack.extend((")", item.right, ", ", item.left))
+                yield "("
+
+    def chars(self):
+        return chain.from_iterable(self.pieces())
+
+    def prefix(self, sizeINT):
+        """
+        序列化結果的前 sizeINT 個字元。
+        """
+        if sizeINT <= EDGE_SIZE:
+            return self.headSTR[:sizeINT]
+        return str(self)[:sizeINT]
+
+    # headSTR/tailSTR 是序列化結果開頭/結尾的 min(EDGE_SIZE, sizeINT) 個字元，不超過 EDGE_SIZE 的前綴/後綴都能直接判斷
+    def startswith(self, prefixSTR):
+        if len(prefixSTR) <= EDGE_SIZE:
+            return self.headSTR.startswith(prefixSTR)
+        return str(self).startswith(prefixSTR)
+
+    def endswith(self, suffixSTR):
+        if len(suffixSTR) <= EDGE_SIZE:
+            return self.tailSTR.endswith(suffixSTR)
+        return str(self).endswith(suffixSTR)
+
+    def __str__(self):
+        return "".join(self.pieces())
+
+def joinConstituent(left, right):
+    """
+    合併兩個成分 (字串或 Constituent)。結果不超過 EDGE_SIZE 個字元時回傳與原本 f"({left}, {right})" 相同的字串，
+    否則回傳 Constituent 節點。
+    """
+    if type(left) is str and type(right) is str:
+        if len(left) + len(right) + 4 <= EDGE_SIZE:
+            return f"({left}, {right})"
+    elif _edgeOf(left)[2] + _edgeOf(right)[2] + 4 <= EDGE_SIZE:
+        return f"({left}, {right})"
+    return Constituent(left, right)
+
+def _edgeOf(item):
+    """
+    回傳 (headSTR, tailSTR, sizeINT)。item 可以是 Constituent 或字串 (例如佔位用的 "")。
+    """
+    if type(item) == str:
+        return item[:EDGE_SIZE], item[-EDGE_SIZE:], len(item)
+    return item.headSTR, item.tailSTR, item.sizeINT
+
+
+# ## bbtree() 結果轉換為 Graph / SET / Constituent Algebra ######################################
+tagOpenPAT = re.compile("<([^<>/]+)>")
+innerRawPAT = re.compile("(?:(?!, )[^)<])*")      # 括號內沒有標記的葉節點：讀到 ", "、")" 或 "<" (可能是夾在裡面的標記) 為止
+outerRawPAT = re.compile("(?:(?!, )[^()<\\s])*")  # 最外層 (多棵樹串接時)：也在 "("、"<" 或空白處結束
+OPEN = "("
+CLOSE = ")"
+
+def readChunks(inputOBJ, chunkSizeINT=65536):
+    """
+    把字串、檔案物件 (read())、Constituent，或由它們組成的 iterable，統一轉成一段一段的字串。
+    """
+    if isinstance(inputOBJ, str):
+        yield inputOBJ
+    elif isinstance(inputOBJ, Constituent):
+        yield from inputOBJ.pieces()
+    elif hasattr(inputOBJ, "read"):
+        while True:
+            chunkSTR = inputOBJ.read(chunkSizeINT)
+            if not chunkSTR:
+                break
+            yield chunkSTR
+    else:
+        for item in inputOBJ:
+            yield from readChunks(item, chunkSizeINT)
+
+def _matchLeaf(bufferSTR, i, depthINT, eof):
+    """
+    return: (葉節點結束的位置, tag, text)；葉節點可能被切在下一段裡 (尚未讀完) 時回傳 None
+
+    括號內的葉節點若是文字與標記混在一起 (例如 "x<ENTITY_oov>a, b (c)</ENTITY_oov>")，
+    標記內的 ", "、"(" 與 ")" 都屬於這個葉節點：遇到標記就直接跳到對應的結束標記之後再繼續讀。
+    """
+    startINT = i
+    tagSTR = textSTR = ""
+    if bufferSTR[i] == "<":
+        tagOpen = tagOpenPAT.match(bufferSTR, i)
+        if tagOpen is None:
+            if not eof and bufferSTR.find(">", i) < 0:
+                return None
+        else:
+            closeINT = bufferSTR.find(f"</{tagOpen.group(1)}>", tagOpen.end())
+            if closeINT >= 0:
+                tagSTR = tagOpen.group(1)
+                textSTR = bufferSTR[tagOpen.end():closeINT]
+                i = closeINT + len(tagSTR) + 3
+            elif not eof:
+                return None
+    if depthINT:
+        endINT = innerRawPAT.match(bufferSTR, i).end()
+        while endINT < len(bufferSTR) and bufferSTR[endINT] == "<":
+            tagOpen = tagOpenPAT.match(bufferSTR, endINT)
+            closeINT = bufferSTR.find(f"</{tagOpen.group(1)}>", tagOpen.end()) if tagOpen else -1
+            if closeINT >= 0:
+                endINT = closeINT + len(tagOpen.group(1)) + 3
+            elif not eof and (tagOpen or bufferSTR.find(">", endINT) < 0):
+                return None
+            else:
+                # 沒有對應結束標記的 "<" 當作一般文字
+                endINT += 1
+            endINT = innerRawPAT.match(bufferSTR, endINT).end()
+    else:
+        endINT = outerRawPAT.match(bufferSTR, i).end()
+    if endINT == len(bufferSTR) and not eof:
+        return None
+    if endINT > i or not tagSTR:
+        # 沒有標記，或標記之後還接著其它文字：整段當作沒有標記的葉節點
+        endINT = max(endINT, startINT + 1)
+        return endINT, "", bufferSTR[startINT:endINT]
+    return endINT, tagSTR, textSTR
+
+def bracketEvents(inputOBJ, chunkSizeINT=65536):
+    """
+    逐段讀取 bbtree() 的括號字串 (可以是多棵樹串接在一起的大檔案)，依序產生 (depth, tag, text)：
+        (depth, OPEN, "")    : 一個非葉節點開始
+        (depth, CLOSE, "")   : 該非葉節點結束
+        (depth, tag, text)   : 葉節點；沒有標記的葉節點 tag 為 ""；
+                               被合併掉的空位 ("(, x)" 裡的空字串) 為 (depth, "", "")
+    depth 為該節點的深度 (最外層為 0)。只保留尚未讀完的一小段字串，記憶體用量與輸入長度無關。
+    最外層 (樹與樹之間) 的空白與換行會被略過。
+    inputOBJ 為 list/tuple 時 (例如 bbtree() 的結果) 每個元素各自是一個完整的成分；
+    其它 iterable 與檔案物件則視為同一個字串的連續片段。
+    """
+    if isinstance(inputOBJ, (list, tuple)):
+        for item in inputOBJ:
+            yield from bracketEvents(item, chunkSizeINT)
+        return
+    chunkITER = readChunks(inputOBJ, chunkSizeINT)
+    bufferSTR = ""
+    i = 0
+    eof = False
+    depthINT = 0
+    previousSTR = ""
+    while True:
+        # 至少留兩個字元在手上：", " 可能被切在兩段之間
+        if len(bufferSTR) - i < 2 and not eof:
+            chunkSTR = next(chunkITER, None)
+            if chunkSTR is None:
+                eof = True
+            else:
+                bufferSTR = bufferSTR[i:] + chunkSTR
+                i = 0
+            continue
+        if i >= len(bufferSTR):
+            break
+
+        charSTR = bufferSTR[i]
+        if charSTR == OPEN:
+            yield depthINT, OPEN, ""
+            depthINT += 1
+            previousSTR = OPEN
+            i += 1
+        elif charSTR == CLOSE:
+            if previousSTR == ",":
+                yield depthINT, "", ""
+            depthINT = max(depthINT - 1, 0)
+            yield depthINT, CLOSE, ""
+            previousSTR = CLOSE
+            i += 1
+        elif charSTR == "," and bufferSTR.startswith(", ", i):
+            if previousSTR == OPEN or previousSTR == ",":
+                yield depthINT, "", ""
+            previousSTR = ","
+            i += 2
+        elif depthINT == 0 and charSTR.isspace():
+            i += 1
+        else:
+            leafTUPLE = _matchLeaf(bufferSTR, i, depthINT, eof)
+            if leafTUPLE is None:
+                chunkSTR = next(chunkITER, None)
+                if chunkSTR is None:
+                    eof = True
+                else:
+                    bufferSTR = bufferSTR[i:] + chunkSTR
+                    i = 0
+                continue
+            i, tagSTR, textSTR = leafTUPLE
+            yield depthINT, tagSTR, textSTR
+            previousSTR = "leaf"
+
+def purgeBracket(inputOBJ, bracket=True, chunkSizeINT=65536):
+    """
+    逐段產生去掉 POS 標記後的文字。
+    bracket 為 True 時保留括號與 ", "，結果與 purgePAT.sub("", "".join(bbtree(...))) 相同；
+    為 False 時只產生各葉節點的文字。
+    """
+    siblingLIST = [False]    # 每一層是否已經輸出過姊妹節點 (決定要不要先輸出 ", ")
+    for depthINT, tagSTR, textSTR in bracketEvents(inputOBJ, chunkSizeINT):
+        if tagSTR == CLOSE:
+            # 多出來的 ")" 不會讓深度小於 0 (見 bracketEvents())，最外層也不能被移除
+            if len(siblingLIST) > 1:
+                siblingLIST.pop()
+            if bracket:
+                yield CLOSE
+            continue
+        if bracket:
+            if depthINT > 0 and siblingLIST[depthINT]:
+                yield ", "
+            siblingLIST[depthINT] = True
+        if tagSTR == OPEN:
+            siblingLIST.append(False)
+            if bracket:
+                yield OPEN
+        elif textSTR:
+            # 沒有標記的葉節點裡若還夾著標記 (極少見)，才動用 purgePAT
+            yield textSTR if tagSTR or "<" not in textSTR else purgePAT.sub("", textSTR)
+
+def taggedTokens(inputOBJ, chunkSizeINT=65536):
+    """
+    逐一產生葉節點的 (tag, text)，略過被合併掉的空位。
+    """
+    for depthINT, tagSTR, textSTR in bracketEvents(inputOBJ, chunkSizeINT):
+        if tagSTR != OPEN and tagSTR != CLOSE and (tagSTR or textSTR):
+            yield tagSTR, textSTR
+
+def bracketNodes(inputOBJ, chunkSizeINT=65536):
+    """
+    依前序逐一產生樹的節點 (id, parentID, depth, tag, text)；非葉節點的 tag 為 OPEN。
+    最外層節點的 parentID 為 -1。只保留目前這條路徑上的節點 id。
+    """
+    idINT = 0
+    stack = []
+    for depthINT, tagSTR, textSTR in bracketEvents(inputOBJ, chunkSizeINT):
+        if tagSTR == CLOSE:
+            if stack:
+                stack.pop()
+            continue
+        if tagSTR != OPEN and not tagSTR and not textSTR:
+            continue
+        yield idINT, stack[-1] if stack else -1, depthINT, tagSTR, textSTR
+        if tagSTR == OPEN:
+            stack.append(idINT)
+        idINT += 1
+
+class ParsedTree:
+    """
+    parseBracket() 的結果：同一棵句法樹的 Graph、TreeIndex、SET 與 Constituent Algebra (AlgebraMask) 形式。
+    葉節點依出現順序命名為 w1, w2, ...，非葉節點依前序命名為 node1, node2, ...，
+    所以 ccommandWithTree()、ccommandWithSet()、ccommandWithAlg() 與 ccommandMatrix() 都可直接使用。
+    wordDICT 記錄每個 wi 對應的原始葉節點字串 (例如 "<ENTITY_noun>女孩</ENTITY_noun>")。
+    """
+    def __init__(self, treeDICT, index, inputSET, algMask, wordDICT):
+        self.treeDICT = treeDICT
+        self.index = index
+        self.inputSET = inputSET
+        self.algMask = algMask
+        self.wordDICT = wordDICT
+
+def parseBracket(inputOBJ, store=None):
+    """
+    把 bbtree() 的結果一次轉成 Graph、TreeIndex、SET 與 Constituent Algebra 四種形式。
+    input:
+    inputOBJ: bbtree() 回傳的字串 list、單一括號字串、檔案物件，或 Constituent (及其 list)
+              list 中有多個成分時，以一個 n 元的根節點把它們包起來
+    store: SET 形式所用的 SetStore，預設為這次呼叫專用的新 SetStore (不會留在全域的 setStore 裡)
+
+    return: ParsedTree
+    """
+    if store is None:
+        store = SetStore()
+    if isinstance(inputOBJ, (str, Constituent)) or hasattr(inputOBJ, "read"):
+        eventITER = bracketEvents(inputOBJ)
+    else:
+        inputLIST = [i for i in inputOBJ if i != ""]
+        if len(inputLIST) > 1:
+            eventITER = chain([(0, OPEN, "")],
+                              ((depthINT + 1, tagSTR, textSTR) for depthINT, tagSTR, textSTR in bracketEvents(inputLIST)),
+                              [(0, CLOSE, "")])
+        else:
+            eventITER = bracketEvents(inputLIST)
+
+    treeDICT = {}
+    wordDICT = {}
+    algMask = AlgebraMask()
+    plusINT = algMask.getBit("+", add=True)
+    nodeLIST = []
+    parentLIST = []
+    depthLIST = []
+    endLIST = []
+    # 每一層開著的成分：[id, 子節點的 SET 形式, 子節點的 bitmask 聯集, 直屬的字]
+    stack = []
+    rootSET = None
+
+    for depthINT, tagSTR, textSTR in eventITER:
+        if tagSTR != OPEN and tagSTR != CLOSE and not tagSTR and not textSTR:
+            continue
+        parentINT = stack[-1][0] if stack else -1
+        if tagSTR == OPEN:
+            idINT = len(nodeLIST)
+            nodeSTR = f"node{len(treeDICT) + 1}"
+            treeDICT[nodeSTR] = set()
+            if stack:
+                treeDICT[nodeLIST[parentINT]].add(nodeSTR)
+            nodeLIST.append(nodeSTR)
+            parentLIST.append(parentINT)
+            depthLIST.append(len(stack))
+            endLIST.append(idINT)
+            stack.append([idINT, [], 0, []])
+        elif tagSTR == CLOSE:
+            idINT, childLIST, maskINT, wordLIST = stack.pop()
+            endLIST[idINT] = len(nodeLIST) - 1
+            if len(childLIST) > 1:
+                maskINT |= plusINT
+            # 直屬於這個成分的字，在代數形式中對應到整個成分；沒有直屬字的成分另外記下
+            for wordSTR in wordLIST:
+                algMask.maskDICT[wordSTR] = maskINT
+            if not wordLIST:
+                algMask.constituentSET.add(maskINT)
+            nodeSET = store.intern(frozenset(childLIST))
+            if stack:
+                stack[-1][1].append(nodeSET)
+                stack[-1][2] |= maskINT
+            else:
+                rootSET = nodeSET
+        else:
+            idINT = len(nodeLIST)
+            wordSTR = f"w{len(wordDICT) + 1}"
+            wordDICT[wordSTR] = f"<{tagSTR}>{textSTR}</{tagSTR}>" if tagSTR else textSTR
+            if stack:
+                treeDICT[nodeLIST[parentINT]].add(wordSTR)
+            nodeLIST.append(wordSTR)
+            parentLIST.append(parentINT)
+            depthLIST.append(len(stack))
+            endLIST.append(idINT)
+            if stack:
+                stack[-1][1].append(wordSTR)
+                stack[-1][2] |= algMask.getBit(wordSTR, add=True) | algMask.getBit(f"B{len(wordDICT)}", add=True)
+                stack[-1][3].append(wordSTR)
+
+    index = TreeIndex.fromArrays(nodeLIST, parentLIST, depthLIST, endLIST)
+    inputSET = {rootSET} if rootSET is not None else set()
+    return ParsedTree(treeDICT, index, inputSET, algMask, wordDICT)
+
+
+
+
+# ## 句法樹輸出為 SVG (不需要 Plotly 或瀏覽器) ######################################
+SVG_STYLE_FILE = "bonsai.css"
+SVG_STYLE = """svg.bonsai { background: #F8FAFC; font-family: Arial, "Noto Sans CJK TC", sans-serif; }
+svg.bonsai .edge { fill: none; stroke: #94A3B8; stroke-width: 2; }
+svg.bonsai .node { fill: #60A5FA; stroke: #1E293B; stroke-width: 2; }
+svg.bonsai .leaf { fill: #34D399; stroke: #1E293B; stroke-width: 2; }
+svg.bonsai .text { fill: #1E293B; font-size: 14px; text-anchor: middle; }
+svg.bonsai .tag { fill: #64748B; font-size: 10px; text-anchor: middle; }
+svg.bonsai .title { fill: #1E293B; font-size: 20px; }
+"""
+SVG_UNIT_X = 48
+SVG_UNIT_Y = 56
+SVG_MARGIN = 40
+SVG_EDGE_CHUNK = 1024
+RENDER_WORKER = None    # None 為 CPU 數
+
+def getLabelDICT(inputOBJ, index):
+    """
+    return: {節點 id: (文字, 標記)}；bbtree() 的結果只標出葉節點的字與 POS 標記，其它樹則標出節點名稱。
+    """
+    if isinstance(inputOBJ, ParsedTree):
+        labelDICT = {}
+        for wordSTR, leafSTR in inputOBJ.wordDICT.items():
+            leaf = leafPAT.match(leafSTR)
+            labelDICT[index.idDICT[wordSTR]] = (leaf.group(2), leaf.group(1)) if leaf else (leafSTR, "")
+        return labelDICT
+    return {i: (node, "") for i, node in enumerate(index.nodeLIST)}
+
+def writeSVG(inputOBJ, outputOBJ, title="", stylesheetFILE=None, alignLeaf=True):
+    """
+    把一棵句法樹畫成 SVG，逐段寫進 outputOBJ (檔案路徑或可 write() 的物件)，不先組出整份字串。
+    input:
+    inputOBJ: bbtree() 的結果 (或 parseBracket() 可接受的任何形式)、ParsedTree、TreeLayout，
+              或 treeMaker() 形式的樹 / TreeIndex
+    stylesheetFILE: 指定時以 <?xml-stylesheet?> 連到這個共用的 CSS 檔，不在每個 SVG 裡重複樣式
+    alignLeaf: 所有字排在最底層
+
+    return: outputOBJ
+    """
+    if isinstance(outputOBJ, (str, os.PathLike)):
+        with open(outputOBJ, "w", encoding="utf-8") as f:
+            writeSVG(inputOBJ, f, title, stylesheetFILE, alignLeaf)
+        return outputOBJ
+
+    if isinstance(inputOBJ, TreeLayout):
+        layout = inputOBJ
+        labelDICT = getLabelDICT(None, layout.index)
+    else:
+        if isinstance(inputOBJ, (str, list, tuple, Constituent)):
+            inputOBJ = parseBracket(inputOBJ)
+        layout = TreeLayout(inputOBJ, alignLeaf=alignLeaf)
+        labelDICT = getLabelDICT(inputOBJ, layout.index)
+
+    topINT = SVG_MARGIN + (SVG_UNIT_Y // 2 if title else 0)
+    # 版面座標 => 像素：x 往右，y 往下 (根節點在最上方)
+    xARRAY = layout.xARRAY * SVG_UNIT_X + SVG_MARGIN
+    yARRAY = -layout.yARRAY * SVG_UNIT_Y + topINT
+    widthINT = int((xARRAY.max() if len(xARRAY) else 0) + SVG_MARGIN)
+    heightINT = int((yARRAY.max() if len(yARRAY) else topINT) + SVG_MARGIN + 16)
+
+    write = outputOBJ.write
+    write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    if stylesheetFILE:
+        write(f'<?xml-stylesheet type="text/css" href="{escape(str(stylesheetFILE))}"?>\n')
+    write(f'<svg xmlns="http://www.w3.org/2000/svg" class="bonsai" width="{widthINT}" height="{heightINT}" viewBox="0 0 {widthINT} {heightINT}">\n')
+    if not stylesheetFILE:
+        write(f"<style>\n{SVG_STYLE}</style>\n")
+    if title:
+        write(f'<text class="title" x="{SVG_MARGIN}" y="{SVG_MARGIN}">{escape(title)}</text>\n')
+
+    # 所有的邊合成一個 <path>，分段寫出
+    segmentARRAY = layout.segmentARRAY * (SVG_UNIT_X, -SVG_UNIT_Y) + (SVG_MARGIN, topINT)
+    write('<path class="edge" d="')
+    for startINT in range(0, len(segmentARRAY), SVG_EDGE_CHUNK):
+        write("".join(f"M{x1:.1f} {y1:.1f}L{x2:.1f} {y2:.1f}" for (x1, y1), (x2, y2) in segmentARRAY[startINT:startINT + SVG_EDGE_CHUNK].tolist()))
+    write('"/>\n')
+
+    for i, (x, y) in enumerate(zip(xARRAY.tolist(), yARRAY.tolist())):
+        classSTR = "leaf" if layout.leafARRAY[i] else "node"
+        write(f'<circle class="{classSTR}" cx="{x:.1f}" cy="{y:.1f}" r="5"/>')
+        if i in labelDICT:
+            textSTR, tagSTR = labelDICT[i]
+            write(f'<text class="text" x="{x:.1f}" y="{y + 22:.1f}">{escape(textSTR)}</text>')
+            if tagSTR:
+                write(f'<text class="tag" x="{x:.1f}" y="{y + 36:.1f}">{escape(tagSTR)}</text>')
+        write("\n")
+    write("</svg>\n")
+    return outputOBJ
+
+def toSVG(inputOBJ, title="", alignLeaf=True):
+    """
+    return: SVG 字串 (內嵌樣式)
+    """
+    from io import StringIO
+    return writeSVG(inputOBJ, StringIO(), title=title, alignLeaf=alignLeaf).getvalue()
+
+def _renderJob(argTUPLE):
+    inputOBJ, pathSTR, titleSTR, stylesheetFILE, alignLeaf = argTUPLE
+    writeSVG(inputOBJ, pathSTR, titleSTR, stylesheetFILE, alignLeaf)
+    return pathSTR
+
+def renderSVG_batch(inputLIST, outputDIR, titleLIST=None, workerINT=RENDER_WORKER, alignLeaf=True, chunkINT=16):
+    """
+    以多個行程把大量 bbtree() 結果分別畫成 outputDIR/0.svg, 1.svg, ...。
+    所有 SVG 共用 outputDIR 裡同一個樣式檔 (SVG_STYLE_FILE)，每個檔案逐段寫出。
+    input:
+    inputLIST: bbtree() 結果的 list
+    titleLIST: 各圖的標題 (例如原句)，預設不加標題
+    workerINT: 行程數，None 為 CPU 數；1 則不開行程池
+
+    return: 依 inputLIST 順序排列的 SVG 檔案路徑
+    """
+    os.makedirs(outputDIR, exist_ok=True)
+    with open(os.path.join(outputDIR, SVG_STYLE_FILE), "w", encoding="utf-8") as f:
+        f.write(SVG_STYLE)
+    if titleLIST is None:
+        titleLIST = [""] * len(inputLIST)
+    jobLIST = [(inputOBJ, os.path.join(outputDIR, f"{i}.svg"), titleLIST[i], SVG_STYLE_FILE, alignLeaf) for i, inputOBJ in enumerate(inputLIST)]
+    if workerINT == 1:
+        return [_renderJob(job) for job in jobLIST]
+    with ProcessPoolExecutor(max_workers=workerINT) as executor:
+        return list(executor.map(_renderJob, jobLIST, chunksize=chunkINT))
+
+
 def finalNounMerge(sentenceSTR):
     headParameter = "final"
     refDICT = {headParameter: []}
     lokiDICT = askLokiMerge(sentenceSTR, refDICT=refDICT, filterLIST=[f"head_{headParameter}"])
 
-    articutDICT = articut.parse(sentenceSTR)
+    articutDICT = getArticut().parse(sentenceSTR)
+    return applyFinalNounMerge(articutDICT, lokiDICT[headParameter])
+
+def applyFinalNounMerge(articutDICT, headLIST):
+    """
+    input:
+    articutDICT: articut.parse() 的結果
+    headLIST: Loki head_final 意圖找到的 head
+
+    return: 依 headLIST 合併後的成分列表 (字串或 Constituent)
+    """
+    headParameter = "final"
     sentenceLIST = splitPAT.split(articutDICT["result_pos"][0])
 
     resultLIST = []
-    for n in lokiDICT[headParameter]:
+    for n in headLIST:
         resultLIST = merge(sentenceLIST, n, headParameter)
 
     if resultLIST == []:
@@ -370,7 +1549,7 @@ def initialNounMerge(sentenceSTR):
     refDICT = {headParameter: []}
     lokiDICT = askLokiMerge(sentenceSTR, refDICT=refDICT, filterLIST=[f"head_{headParameter}"])
 
-    articutDICT = articut.parse(sentenceSTR)
+    articutDICT = getArticut().parse(sentenceSTR)
     sentenceLIST = splitPAT.split(articutDICT["result_pos"][0])
 
     resultLIST = []
@@ -387,30 +1566,30 @@ def link(sentenceLIST, linker):
             try:
                 if sentenceLIST[i+3].startswith("<FUNC_inner>的") and i+4 == len(sentenceLIST):
                     #resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, ({sentenceLIST[i+2]}, {sentenceLIST[i+3]})))")
-                    resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+                    resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
                     sentenceLIST[i+1] = ""
                     sentenceLIST[i+2] = ""
                     #sentenceLIST[i+3] = ""
                 elif sentenceLIST[i].startswith("<MODIFIER>"):
-                    resultLIST.append(f"({sentenceLIST[i]}, {sentenceLIST[i+1]})")
+                    resultLIST.append(joinConstituent(sentenceLIST[i], sentenceLIST[i+1]))
                     sentenceLIST[i+1] = ""
                 else:
-                    resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+                    resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
                     sentenceLIST[i+1] = ""
                     sentenceLIST[i+2] = ""
             except:
                 try:
                     if sentenceLIST[i].startswith("<MODIFIER>"):
-                        resultLIST.append(f"({sentenceLIST[i]}, {sentenceLIST[i+1]})")
+                        resultLIST.append(joinConstituent(sentenceLIST[i], sentenceLIST[i+1]))
                         sentenceLIST[i+1] = ""
 
                     else:
-                        resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+                        resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
                         sentenceLIST[i+1] = ""
                         sentenceLIST[i+2] = ""
                 except:
                     try:
-                        resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+                        resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
                         sentenceLIST[i+1] = ""
                         sentenceLIST[i+2] = ""
                     except:
@@ -425,12 +1604,12 @@ def EP(sentenceLIST, epTUPL):
     resultLIST = []
     for i in range(len(sentenceLIST)-2):
         if sentenceLIST[i].startswith(epTUPL[0]) and sentenceLIST[i+2].startswith(epTUPL[1]):
-            resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+            resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
             sentenceLIST[i+1] = ""
             sentenceLIST[i+2] = ""
         #<ad-hoc>
         elif sentenceLIST[i].startswith(epTUPL[0]) and sentenceLIST[i+1].startswith(epTUPL[1]):
-            resultLIST.append(f"({sentenceLIST[i]}, {sentenceLIST[i+1]})")
+            resultLIST.append(joinConstituent(sentenceLIST[i], sentenceLIST[i+1]))
             sentenceLIST[i+1] = ""
         #</ad-hoc>
         else:
@@ -449,12 +1628,12 @@ def CLP(sentenceLIST, clpTUPL):
     resultLIST = []
     for i in range(len(sentenceLIST)-2):
         if sentenceLIST[i].startswith(clpTUPL[0]) and sentenceLIST[i+2].startswith(clpTUPL[1]):
-            resultLIST.append(f"({sentenceLIST[i]}, ({sentenceLIST[i+1]}, {sentenceLIST[i+2]}))")
+            resultLIST.append(joinConstituent(sentenceLIST[i], joinConstituent(sentenceLIST[i+1], sentenceLIST[i+2])))
             sentenceLIST[i+1] = ""
             sentenceLIST[i+2] = ""
         #<ad-hoc>
         elif sentenceLIST[i].startswith(clpTUPL[0]) and sentenceLIST[i+1].startswith(clpTUPL[1]):
-            resultLIST.append(f"({sentenceLIST[i]}, {sentenceLIST[i+1]})")
+            resultLIST.append(joinConstituent(sentenceLIST[i], sentenceLIST[i+1]))
             sentenceLIST[i+1] = ""
         #</ad-hoc>
         else:
@@ -473,7 +1652,7 @@ def VP(sentenceLIST, verb):
     resultLIST = []
     for i in range(len(sentenceLIST)-1):
         if sentenceLIST[i+1].startswith(f"{verb}"):
-            resultLIST.append(f"({sentenceLIST[i]}, {sentenceLIST[i+1]})")
+            resultLIST.append(joinConstituent(sentenceLIST[i], sentenceLIST[i+1]))
             sentenceLIST[i+1] = ""
         else:
             resultLIST.append(sentenceLIST[i])
@@ -527,14 +1706,14 @@ def merge(sentenceLIST, head, headParameter):
                     if sentenceLIST[i-2].endswith("</MODIFIER>") or  sentenceLIST[i-2].endswith("</MODIFIER_color>"):
                         pass
                     else:
-                        resultLIST.append(f"({sentenceLIST[i-1]}, {sentenceLIST[i]})")
+                        resultLIST.append(joinConstituent(sentenceLIST[i-1], sentenceLIST[i]))
                         sentenceLIST[i-1] = ""
                     #except:
                         #resultLIST.append(f"({sentenceLIST[i-1]}, {sentenceLIST[i]})")
                         #sentenceLIST[i-1] = ""
             #</ad-hoc>
                 else:
-                    resultLIST.append(f"({sentenceLIST[i-1]}, {sentenceLIST[i]})")
+                    resultLIST.append(joinConstituent(sentenceLIST[i-1], sentenceLIST[i]))
                     sentenceLIST[i-1] = ""
         else:
             resultLIST.append(sentenceLIST[i])
@@ -542,33 +1721,187 @@ def merge(sentenceLIST, head, headParameter):
     return [word for word in reversed(resultLIST) if word!=""]
 
 
+# bbtree_batch() 同時進行的 Articut 請求數
+BATCH_WORKER = 4
+
+# ## bbtree() 的合併規則表 ######################################
+leftMergeLIST = ["<RANGE_locality>"]#, "<ENTITY_n", "<ENTITY_o"]
+rightMergeLIST = ["<FUNC_inner>在", "<FUNC_inner>從", "<AUX>為", "<FUNC_conjunction>", "<ACTION_verb>", "<VerbP>", "<ENTITY_possessive>"]
+linkerMergeLIST = ["<AUX>", "<FUNC_inner>得", "(<FUNC_inner>在"]
+EPLIST = [("<ENTITY_DetPhrase>", "<ENTITY"), ("<ENTITY_DetPhrase>", "<FUNC_inner>的"), ("<MODIFIER>", "<FUNC_inner>的"), ("<ENTITY_pronoun>", "<FUNC_inner>的"), ("(<ENTITY_pronoun>", "<ENTITY"), ("(<ENTITY_DetPhrase>", "<ENTITY")]
+VPLIST = ["(<ACTION_",]
+CLPLIST = [("<ENTITY_classifier>", "<ENTITY")]
+
+class MergeRuleEngine:
+    """
+    把 bbtree() 的規則表一次編譯成一棵以 POS 標記前綴為路徑的字典樹 (trie)。
+
+    同一個階段裡的規則彼此有先後依賴 (前一條規則合併出來的 "(<...", 可能正是下一條規則要找的前綴)，
+    所以規則仍依原順序執行，輸出與逐條呼叫 merge()/link()/EP()/CLP()/VP() 完全相同。
+    差別在於每個階段先做一次索引掃描，以 trie 查出句中實際出現的前綴，
+    不可能觸發的規則就直接跳過，不再掃描 sentenceLIST、也不再重建列表。
+
+    注意這不是單趟 (single pass) 的編譯管線：會觸發的規則仍然呼叫原本的規則函式，
+    由它從頭掃描並重建 sentenceLIST，之後再重新索引一次。
+    所以成本是 O(n × 實際觸發的規則數)，省下的只是不會觸發的規則。
+    """
+    def __init__(self, stageLIST, maxEntryINT=65536):
+        """
+        input:
+        stageLIST: [(ruleFunc, ruleLIST, argTUPLE), ...]，依執行順序排列的規則階段。
+                   ruleFunc 為 merge/link/EP/CLP/VP；ruleLIST 內的規則可以是前綴字串或 (前綴, 前綴) 的 tuple；
+                   argTUPLE 為呼叫 ruleFunc 時附加在 (sentenceLIST, rule) 之後的參數。
+        maxEntryINT: token 開頭 -> bitmask 快取的上限，超過時整個清空
+        """
+        self.trieDICT = {}
+        self.prefixDICT = {}
+        self.depthINT = 0  # 最長前綴的長度
+        self.headDICT = {}  # token 的前 depthINT 個字元 -> bitmask
+        self.maxEntryINT = maxEntryINT
+        self.stageLIST = []
+        for ruleFunc, ruleLIST, argTUPLE in stageLIST:
+            compiledLIST = []
+            for rule in ruleLIST:
+                prefixTUPLE = (rule,) if type(rule) == str else tuple(rule)
+                requireINT = 0
+                for prefixSTR in prefixTUPLE:
+                    requireINT |= self._compile(prefixSTR)
+                compiledLIST.append((rule, requireINT))
+            self.stageLIST.append((ruleFunc, compiledLIST, tuple(argTUPLE)))
+
+    def _compile(self, prefixSTR):
+        if prefixSTR not in self.prefixDICT:
+            self.prefixDICT[prefixSTR] = 1 << len(self.prefixDICT)
+            self.depthINT = max(self.depthINT, len(prefixSTR))
+            node = self.trieDICT
+            for c in prefixSTR:
+                node = node.setdefault(c, {})
+            # 以空字串當終點標記，不會與任何字元衝突
+            node[""] = self.prefixDICT[prefixSTR]
+        return self.prefixDICT[prefixSTR]
+
+    def match(self, token):
+        """
+        沿著 trie 走 token 的開頭，回傳它符合的所有前綴 (bitmask)。最多只讀到最長前綴的長度。
+        token 可以是字串或 Constituent。
+        """
+        maskINT = 0
+        node = self.trieDICT
+        for c in (token if type(token) == str else token.prefix(self.depthINT)):
+            node = node.get(c)
+            if node is None:
+                break
+            maskINT |= node.get("", 0)
+        return maskINT
+
+    def scan(self, sentenceLIST, maskDICT):
+        """
+        一次索引掃描：回傳 sentenceLIST 中出現過的所有前綴 (bitmask)。maskDICT 用來記住已查過的 token。
+        """
+        # 整串只在 set()/map() 裡走過 (C 迴圈)，Python 層級只處理新出現的 token 與不同的 bitmask
+        tokenSET = set(sentenceLIST)
+        for token in tokenSET.difference(maskDICT):
+            # bitmask 只由 token 的前 depthINT 個字元決定，跨句共用查詢結果
+            headSTR = token[:self.depthINT] if type(token) == str else token.prefix(self.depthINT)
+            maskINT = self.headDICT.get(headSTR)
+            if maskINT is None:
+                if len(self.headDICT) >= self.maxEntryINT:
+                    self.headDICT.clear()
+                maskINT = self.headDICT[headSTR] = self.match(headSTR)
+            maskDICT[token] = maskINT
+        presentINT = 0
+        for maskINT in set(map(maskDICT.__getitem__, tokenSET)):
+            presentINT |= maskINT
+        return presentINT
+
+    def run(self, sentenceLIST):
+        maskDICT = {}
+        for ruleFunc, compiledLIST, argTUPLE in self.stageLIST:
+            presentINT = self.scan(sentenceLIST, maskDICT)
+            for rule, requireINT in compiledLIST:
+                if presentINT & requireINT != requireINT:
+                    continue
+                sizeINT = len(sentenceLIST)
+                sentenceLIST = ruleFunc(sentenceLIST, rule, *argTUPLE)
+                # 規則函式只會合併或移除成分，長度不變就表示沒有任何合併，不必重新索引；
+                # 否則合併後會產生新的 "(<..." 前綴，需要重新索引
+                if len(sentenceLIST) != sizeINT:
+                    presentINT = self.scan(sentenceLIST, maskDICT)
+        return sentenceLIST
+
+mergeEngine = MergeRuleEngine([(merge, leftMergeLIST, ("final",)),
+                               (merge, rightMergeLIST, ("initial",)),
+                               (link, linkerMergeLIST, ()),
+                               (EP, EPLIST, ()),
+                               (CLP, CLPLIST, ()),
+                               (VP, VPLIST, ())])
+
 def bbtree(inputSTR):
-    sentenceLIST = finalNounMerge(inputSTR)
+    return growTree(finalNounMerge(inputSTR))
 
-    leftMergeLIST = ["<RANGE_locality>"]#, "<ENTITY_n", "<ENTITY_o"]
-    rightMergeLIST = ["<FUNC_inner>在", "<FUNC_inner>從", "<AUX>為", "<FUNC_conjunction>", "<ACTION_verb>", "<VerbP>", "<ENTITY_possessive>"]
-    linkerMergeLIST = ["<AUX>", "<FUNC_inner>得", "(<FUNC_inner>在"]
-    EPLIST = [("<ENTITY_DetPhrase>", "<ENTITY"), ("<ENTITY_DetPhrase>", "<FUNC_inner>的"), ("<MODIFIER>", "<FUNC_inner>的"), ("<ENTITY_pronoun>", "<FUNC_inner>的"), ("(<ENTITY_pronoun>", "<ENTITY"), ("(<ENTITY_DetPhrase>", "<ENTITY")]
-    VPLIST = ["(<ACTION_",]
-    CLPLIST = [("<ENTITY_classifier>", "<ENTITY")]
+def bbtree_batch(inputLIST, workerINT=BATCH_WORKER):
+    """
+    input:
+    inputLIST: 要建樹的句子列表
+    workerINT: 同時進行的 Articut 請求數上限
 
-    resultLIST = []
-    for l in leftMergeLIST:
-        sentenceLIST =  merge(sentenceLIST, l, "final")
-    for r in rightMergeLIST:
-        sentenceLIST =  merge(sentenceLIST, r, "initial")
+    return: 與 inputLIST 順序相同的 bbtree() 結果列表
+
+    所有句子的 Loki 查詢合併成一次 askLokiMerge() (由 execLoki 依 INPUT_LIMIT 分批送出)，
+    Articut 則以 workerINT 條執行緒並行，每個不重複的句子只 parse 一次。
+    """
+    headParameter = "final"
+    uniqueLIST = list(dict.fromkeys(inputLIST))
+    if uniqueLIST == []:
+        return []
+
+    # head_final 意圖會把每個 head 的來源句子記在 final_input，與 final 一一對應
+    refDICT = {headParameter: [], f"{headParameter}_input": []}
+    lokiDICT = askLokiMerge(uniqueLIST, refDICT=refDICT, filterLIST=[f"head_{headParameter}"])
+    headLIST = getHeadLIST(uniqueLIST, lokiDICT[f"{headParameter}_input"], lokiDICT[headParameter])
+
+    with ThreadPoolExecutor(max_workers=max(1, workerINT)) as executor:
+        articutDICT = dict(zip(uniqueLIST, executor.map(getArticut().parse, uniqueLIST)))
+
+    treeDICT = {}
+    for inputSTR in uniqueLIST:
+        treeDICT[inputSTR] = growTree(applyFinalNounMerge(articutDICT[inputSTR], headLIST[len(treeDICT)]))
+    return [list(treeDICT[inputSTR]) for inputSTR in inputLIST]
+
+def getHeadLIST(inputLIST, sourceLIST, headLIST):
+    """
+    input:
+    inputLIST: 送進 Loki 的句子列表 (不重複、未經 splitLIST 切割)
+    sourceLIST: 意圖記下的來源句子 (與 headLIST 一一對應)
+    headLIST: Loki 找到的 head
 
-    for lk in linkerMergeLIST:
-        sentenceLIST =  link(sentenceLIST, lk)
+    return: 與 inputLIST 順序相同，每一句各自的 head 列表
 
-    for ep_t in EPLIST:
-        sentenceLIST = EP(sentenceLIST, ep_t)
+    bbtree_batch() 不切割句子，意圖記下的來源就是送出的那一句，所以直接以來源句子查出它在 inputLIST 的位置；
+    不以 head 或片段做子字串比對，避免共用子字串的句子拿到別句的 head。
+    查不到來源的 head (例如 Loki 端改寫了句子) 留在上一個 head 所屬的句子。
+    """
+    resultLIST = [[] for _ in inputLIST]
+    if resultLIST == []:
+        return resultLIST
+    # 完全相同的句子優先，其次才是去除前後空白後相同的句子
+    indexDICT = {inputSTR.strip(): i for i, inputSTR in reversed(list(enumerate(inputLIST)))}
+    indexDICT.update((inputSTR, i) for i, inputSTR in enumerate(inputLIST))
+    i = 0
+    for sourceSTR, head in zip(sourceLIST, headLIST):
+        i = indexDICT.get(sourceSTR, indexDICT.get(sourceSTR.strip(), i))
+        resultLIST[i].append(head)
+    return resultLIST
 
-    for clp in CLPLIST:
-        sentenceLIST = CLP(sentenceLIST, clp)
+def growTree(sentenceLIST):
+    """
+    input:
+    sentenceLIST: finalNounMerge() 的結果
 
-    for vp in VPLIST:
-        sentenceLIST = VP(sentenceLIST, vp)
+    return: bbtree() 的括號字串列表
+    """
+    resultLIST = []
+    sentenceLIST = [str(c) for c in mergeEngine.run(sentenceLIST)]
 
     #<ad-hoc>
     if len(sentenceLIST) == 2:
@@ -601,60 +1934,10 @@ if __name__ == "__main__":
         print(i)
         result = bbtree(i)
         #pprint(result)
-        print(purgePAT.sub("", "".join(result)))
+        print("".join(purgeBracket(result)))
         print("")
     #result = merge(l, "<ENTITY_DetPhrase>", "initial")
     #print(result)
 
 
-    #print("\n#以 Graph 建立句法樹 >>>")
-    #sentenceLengthLIST = [10, 100, 1000]
-    #for l in sentenceLengthLIST:
-        #sentenceLength = l
-        #inputSentence = ""
-        #for i in range(sentenceLength):
-            #inputSentence += f"w{i + 1}"
-        #result = treeMaker(inputSentence)
-        #tree = result[0]
-        #time = result[1]
-        ##print(f"句子字數:{l:<5}; 以二元樹建立句法樹，需耗時：{time}")
-        ##visualize_tree() #只是為了視覺化，不涉及計算
-        #visualize_tree(tree)
-        ##ccmdresult = ccommandWithTree(tree, commandee=f"w{l}")
-        ##ccommand = ccmdresult[0]
-        ##ccommand_computation_time = ccmdresult[1]
-        ##print(f"句子字數:{l:<5}; 在二元樹裡計算 w1 是否 c-command w{l}，需耗時：{ccommand_computation_time}")
-
-    #print("\n#以 SET 建立句法樹 >>>")
-    #sentenceLengthLIST = [10, 100, 1000]
-    #for l in sentenceLengthLIST:
-        #sentenceLength = l
-        #inputSentence = ""
-        #for i in range(sentenceLength):
-            #inputSentence += f"w{i + 1}"
-        #result = setMaker(inputSentence)
-        #setrepresentation = result[0]
-        #time = result[1]
-        #print(f"句子字數:{l:<5}; 以二元集合建立句法樹，需耗時：{time}")
-        #ccmdresult = ccommandWithSet(setrepresentation, commandee=f"w{l}")
-        #ccommand = ccmdresult[0]
-        #ccommand_computation_time = ccmdresult[1]
-        #print(f"句子字數:{l:<5}; 在二元素集合裡計算 w1 是否 c-command w{l}，需耗時：{ccommand_computation_time}")
-
-
-    #print("\n#以 Constituent Algebra 建立句法樹 >>>")
-    #sentenceLengthLIST = [10, 100, 1000]
-    #for l in sentenceLengthLIST:
-        #sentenceLength = l
-        #inputSentence = ""
-        #for i in range(sentenceLength):
-            #inputSentence += f"w{i + 1}"
-        #result = algMaker(inputSentence)
-        #linArepresenatation = result[0]
-        #time = result[1]
-        ##print(linArepresenatation)
-        #print(f"句子字數:{l:<5}; 以代數集合建立句法樹，需耗時：{time}")
-        #ccmdresult = ccommandWithAlg(linArepresenatation, commandee=set(f"w{l}"))
-        #ccommand = ccmdresult[0]
-        #ccommand_computation_time = ccmdresult[1]
-        #print(f"句子字數:{l:<5}; 在代數集合裡計算 w1 是否 c-command w{l}，需耗時：{ccommand_computation_time}")
\ No newline at end of file
+    # Graph、SET、Constituent Algebra 三種表示法的效能比較：python -m benchmark (見 benchmark.py)
@@ -42,16 +42,35 @@
         }
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from glob import glob
 from importlib import import_module
 from pathlib import Path
-from requests import post
 from requests import codes
+from threading import Lock
+import asyncio
 import json
 import math
 import os
 import re
+import sqlite3
+import sys
+import time
+
+try:
+    from linguistics_support.http_session import makeSession
+except ImportError:
+    # 直接在這個目錄執行時，從 repo 根目錄載入共用的 linguistics_support
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    from linguistics_support.http_session import makeSession
+
+# 非同步版本 (aexecLoki) 使用 aiohttp，未安裝時其它功能不受影響
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # Chatbot 模式
 CHATBOT_MODE = False
@@ -63,12 +82,24 @@ except:
 BASE_PATH = os.path.dirname(os.path.abspath(__file__))
 CWD_PATH = str(Path.cwd())
 
-lokiIntentDICT = {}
+# 啟動時只記下意圖檔的位置，runLoki() 第一次遇到該意圖時才 import
+lokiIntentPathDICT = {}
 for modulePath in glob("{}/intent/Loki_*.py".format(CWD_PATH)):
     moduleNameSTR = Path(modulePath).stem[5:]
     modulePathSTR = modulePath.replace(CWD_PATH, "").replace(".py", "").replace("/", ".").replace("\\", ".")[1:]
-    globals()[moduleNameSTR] = import_module(modulePathSTR)
-    lokiIntentDICT[moduleNameSTR] = globals()[moduleNameSTR]
+    lokiIntentPathDICT[moduleNameSTR] = modulePathSTR
+
+lokiIntentDICT = {}
+def getLokiIntent(intentSTR):
+    """
+    回傳意圖模組 (第一次呼叫時 import 並保留)；沒有這個意圖時回傳 None。
+    """
+    if intentSTR not in lokiIntentDICT:
+        if intentSTR not in lokiIntentPathDICT:
+            return None
+        globals()[intentSTR] = import_module(lokiIntentPathDICT[intentSTR])
+        lokiIntentDICT[intentSTR] = globals()[intentSTR]
+    return lokiIntentDICT[intentSTR]
 
 LOKI_URL = "https://api.droidtown.co/Loki/BulkAPI/"
 try:
@@ -86,6 +117,155 @@ except Exception as e:
 INTENT_FILTER = []
 INPUT_LIMIT = 20
 
+# 並行說明
+# LOKI_WORKER = 1 => execLoki() 逐批送出 (預設)
+# LOKI_WORKER = N => execLoki() 最多同時送出 N 批 (請一併確認 HTTP_POOL_SIZE >= N)
+LOKI_WORKER = 1
+
+# HTTP 連線設定
+# HTTP_POOL_SIZE => 保留的 keep-alive 連線數 (並行送出請求時請不要小於並行數)
+# HTTP_RETRY     => 遇到 5xx 或連線錯誤時的重試次數
+# HTTP_BACKOFF   => 第 n 次重試前等待 HTTP_BACKOFF * 2^(n-1) 秒
+# HTTP_TIMEOUT   => (連線, 讀取) 逾時秒數
+HTTP_POOL_SIZE = 10
+HTTP_RETRY = 3
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = (5, 60)
+
+# Loki 查詢不會改變伺服器狀態，POST 也可以安全地重送 (idempotent=True)
+# 需要不同的連線設定時，直接替換 lokiSession，例如 lokiSession = makeSession(poolSizeINT=32)
+lokiSession = makeSession(poolSizeINT=HTTP_POOL_SIZE, retryINT=HTTP_RETRY, backoffFLOAT=HTTP_BACKOFF)
+
+# Loki 結果快取說明
+# LOKI_CACHE_SIZE = 0       => 不使用快取
+# LOKI_CACHE_SIZE = N       => 記憶體中最多保留 N 句的 Loki 結果 (LRU)
+# LOKI_CACHE_FILE = ""      => 不使用硬碟快取 (預設)
+# LOKI_CACHE_FILE = path    => 另外把結果存在 SQLite 檔 path，重新啟動後仍可使用
+# LOKI_CACHE_TTL = N        => 距上次確認專案版本超過 N 秒時，整批都命中快取的請求仍會先送出一句確認版本
+LOKI_CACHE_SIZE = 1000
+LOKI_CACHE_FILE = ""
+LOKI_CACHE_TTL = 300
+
+class LokiCache():
+    """
+    以 (utterance, filterLIST, Loki 專案版本) 為鍵的 Loki 結果快取。
+    每筆快取存的是 BulkAPI 回傳的單句結果 (result_list 中的一項)。
+    只要任何一次回應的 version 與目前不同，就視為專案已更新，清除所有舊版本的快取。
+    命中快取的句子不會送出請求，也不會消耗 word_count_balance；
+    但版本超過 ttlINT 秒沒有確認時 (isStale())，LokiResult 會送出一句確認專案是否已更新。
+    參數為 None 時，在建立時才讀取 LOKI_CACHE_SIZE / LOKI_CACHE_FILE / LOKI_CACHE_TTL。
+    """
+    def __init__(self, sizeINT=None, cacheFILE=None, ttlINT=None):
+        if sizeINT is None:
+            sizeINT = LOKI_CACHE_SIZE
+        if cacheFILE is None:
+            cacheFILE = LOKI_CACHE_FILE
+        if ttlINT is None:
+            ttlINT = LOKI_CACHE_TTL
+        self.sizeINT = sizeINT
+        self.ttlINT = ttlINT
+        self.checkedTIME = None
+        self.version = ""
+        self.balance = -1
+        self.hitINT = 0
+        self.missINT = 0
+        self.memoryDICT = OrderedDict()
+        self.lock = Lock()
+        self.db = None
+        if cacheFILE and sizeINT > 0:
+            self.db = sqlite3.connect(cacheFILE, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS loki (key TEXT PRIMARY KEY, version TEXT NOT NULL, result TEXT NOT NULL)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS loki_meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.db.commit()
+            row = self.db.execute("SELECT value FROM loki_meta WHERE name = 'version'").fetchone()
+            if row:
+                self.version = row[0]
+
+    def makeKey(self, inputSTR, filterLIST):
+        # loki_key 不同就是不同的專案
+        return json.dumps([USERNAME, LOKI_KEY, inputSTR, sorted(filterLIST)], ensure_ascii=False)
+
+    def get(self, inputSTR, filterLIST):
+        if self.sizeINT <= 0 or self.version == "":
+            return None
+
+        keySTR = self.makeKey(inputSTR, filterLIST)
+        with self.lock:
+            if keySTR in self.memoryDICT:
+                self.memoryDICT.move_to_end(keySTR)
+                self.hitINT += 1
+                return self.memoryDICT[keySTR]
+
+            if self.db:
+                row = self.db.execute("SELECT result FROM loki WHERE key = ? AND version = ?", (keySTR, self.version)).fetchone()
+                if row:
+                    self._remember(keySTR, json.loads(row[0]))
+                    self.hitINT += 1
+                    return self.memoryDICT[keySTR]
+
+            self.missINT += 1
+        return None
+
+    def set(self, inputSTR, filterLIST, lokiResultDICT):
+        if self.sizeINT <= 0:
+            return
+
+        keySTR = self.makeKey(inputSTR, filterLIST)
+        with self.lock:
+            self._remember(keySTR, lokiResultDICT)
+            if self.db:
+                self.db.execute("INSERT OR REPLACE INTO loki (key, version, result) VALUES (?, ?, ?)",
+                                (keySTR, self.version, json.dumps(lokiResultDICT, ensure_ascii=False)))
+                self.db.commit()
+
+    def _remember(self, keySTR, lokiResultDICT):
+        self.memoryDICT[keySTR] = lokiResultDICT
+        self.memoryDICT.move_to_end(keySTR)
+        while len(self.memoryDICT) > self.sizeINT:
+            self.memoryDICT.popitem(last=False)
+
+    def setVersion(self, versionSTR, balance=-1):
+        """
+        記錄最新一次回應的專案版本與餘額。版本改變時清除快取並回傳 True。
+        """
+        with self.lock:
+            self.balance = balance
+            self.checkedTIME = time.monotonic()
+            if versionSTR == self.version:
+                return False
+
+            self.version = versionSTR
+            self.memoryDICT.clear()
+            if self.db:
+                self.db.execute("DELETE FROM loki WHERE version != ?", (versionSTR,))
+                self.db.execute("INSERT OR REPLACE INTO loki_meta (name, value) VALUES ('version', ?)", (versionSTR,))
+                self.db.commit()
+            return True
+
+    def isStale(self):
+        """
+        是否已超過 ttlINT 秒沒有從回應確認專案版本 (從硬碟載入的版本一開始就視為需要確認)。
+        """
+        return self.checkedTIME is None or time.monotonic() - self.checkedTIME > self.ttlINT
+
+    def clear(self):
+        with self.lock:
+            self.memoryDICT.clear()
+            if self.db:
+                self.db.execute("DELETE FROM loki")
+                self.db.commit()
+
+    def getStats(self):
+        return {"hit": self.hitINT, "miss": self.missINT, "size": len(self.memoryDICT), "version": self.version}
+
+# 與 Articut 的快取相同，在第一次查詢時才建立，import 之後修改 LOKI_CACHE_* 仍然有效
+lokiCache = None
+def getLokiCache():
+    global lokiCache
+    if lokiCache is None:
+        lokiCache = LokiCache()
+    return lokiCache
+
 class LokiResult():
     status = False
     message = ""
@@ -93,7 +273,10 @@ class LokiResult():
     balance = -1
     lokiResultLIST = []
 
-    def __init__(self, inputLIST, filterLIST):
+    def __init__(self, inputLIST, filterLIST, fetch=True):
+        """
+        fetch 為 False 時只做初始化，不送出請求 (供 aLokiResult() 以非同步方式填入結果)。
+        """
         self.status = False
         self.message = ""
         self.version = ""
@@ -102,28 +285,78 @@ class LokiResult():
         # filterLIST 空的就採用預設的 INTENT_FILTER
         if filterLIST == []:
             filterLIST = INTENT_FILTER
+        self.inputLIST = inputLIST
+        self.filterLIST = filterLIST
+        self.cachedLIST = []
+
+        if fetch:
+            try:
+                missLIST = self.loadCache()
+                while missLIST:
+                    result = lokiSession.post(LOKI_URL, json=self.getPayload(missLIST), timeout=HTTP_TIMEOUT)
+                    if result.status_code == codes.ok:
+                        missLIST = self.loadResponse(result.json())
+                    else:
+                        self.message = "{} Connection failed.".format(result.status_code)
+                        break
+            except Exception as e:
+                self.message = str(e)
+
+    def loadCache(self):
+        """
+        先查快取，回傳需要送出請求的句子。全部命中時直接以快取內容完成結果；
+        但快取的版本太久沒確認時，第一句改為重新送出，藉由它的回應確認專案是否已更新。
+        """
+        lokiCache = getLokiCache()
+        self.cachedLIST = [lokiCache.get(inputSTR, self.filterLIST) for inputSTR in self.inputLIST]
+        if self.cachedLIST and None not in self.cachedLIST and lokiCache.isStale():
+            self.cachedLIST[0] = None
+        missLIST = [inputSTR for inputSTR, cached in zip(self.inputLIST, self.cachedLIST) if cached is None]
+        if missLIST == []:
+            self.status = True
+            self.message = "Success!"
+            self.version = lokiCache.version
+            self.balance = lokiCache.balance
+            self.lokiResultLIST = self.cachedLIST
+        return missLIST
+
+    def getPayload(self, missLIST):
+        return {
+            "username": USERNAME,
+            "input_list": missLIST,
+            "loki_key": LOKI_KEY,
+            "filter_list": self.filterLIST
+        }
 
-        try:
-            result = post(LOKI_URL, json={
-                "username": USERNAME,
-                "input_list": inputLIST,
-                "loki_key": LOKI_KEY,
-                "filter_list": filterLIST
-            })
-
-            if result.status_code == codes.ok:
-                result = result.json()
-                self.status = result["status"]
-                self.message = result["msg"]
-                if result["status"]:
-                    self.version = result["version"]
-                    if "word_count_balance" in result:
-                        self.balance = result["word_count_balance"]
-                    self.lokiResultLIST = result["result_list"]
-            else:
-                self.message = "{} Connection failed.".format(result.status_code)
-        except Exception as e:
-            self.message = str(e)
+    def loadResponse(self, result):
+        """
+        載入 BulkAPI 的回應 (json)。回傳還需要重新送出的句子 (通常是空列表)。
+        """
+        self.status = result["status"]
+        self.message = result["msg"]
+        if result["status"]:
+            self.version = result["version"]
+            if "word_count_balance" in result:
+                self.balance = result["word_count_balance"]
+            lokiCache = getLokiCache()
+            versionChanged = lokiCache.setVersion(self.version, self.balance)
+            missCountINT = self.cachedLIST.count(None)
+            if versionChanged and missCountINT < len(self.inputLIST):
+                # 專案已更新，已命中的快取也是舊版本的結果，整批重新送出 (版本更新時快取已清空)
+                return self.loadCache()
+
+            if len(result["result_list"]) != missCountINT:
+                self.status = False
+                self.message = "result_list has {} results for {} inputs.".format(len(result["result_list"]), missCountINT)
+                return []
+
+            missResultLIST = iter(result["result_list"])
+            for i, cached in enumerate(self.cachedLIST):
+                if cached is None:
+                    self.cachedLIST[i] = next(missResultLIST)
+                    lokiCache.set(self.inputLIST[i], self.filterLIST, self.cachedLIST[i])
+            self.lokiResultLIST = self.cachedLIST
+        return []
 
     def getStatus(self):
         return self.status
@@ -190,33 +423,80 @@ class LokiResult():
             rst = lokiResultDICT["argument"]
         return rst
 
+def getLokiResultLIST(inputLIST, filterLIST=[], refDICT={}):
+    """
+    執行一批 Loki 並交給各意圖處理，但不合併結果。
+
+    output
+        lokiResultLIST    DICT[]    每一句 input 各自的 lokiResultDICT；請求失敗時為 None
+        messageSTR        STR       請求失敗時的錯誤訊息
+    """
+    lokiRst = LokiResult(inputLIST, filterLIST)
+    if not lokiRst.getStatus():
+        return None, lokiRst.getMessage()
+    return processLokiResult(lokiRst, inputLIST, refDICT), ""
+
+def processLokiResult(lokiRst, inputLIST, refDICT={}):
+    """
+    將 LokiResult 中每一句的結果交給對應的意圖，回傳每句各自的 lokiResultDICT。
+    """
+    lokiResultLIST = []
+    for index, key in enumerate(inputLIST):
+        lokiResultDICT = {k: [] for k in refDICT}
+        for resultIndex in range(0, lokiRst.getLokiLen(index)):
+            lokiIntent = getLokiIntent(lokiRst.getIntent(index, resultIndex))
+            if lokiIntent:
+                lokiResultDICT = lokiIntent.getResult(
+                    key, lokiRst.getUtterance(index, resultIndex), lokiRst.getArgs(index, resultIndex),
+                    lokiResultDICT, refDICT, pattern=lokiRst.getPattern(index, resultIndex))
+        lokiResultLIST.append(lokiResultDICT)
+    return lokiResultLIST
+
+def mergeLokiResult(resultDICT, lokiResultDICT):
+    # save lokiResultDICT to resultDICT
+    for k in lokiResultDICT:
+        if k not in resultDICT:
+            resultDICT[k] = []
+        if type(resultDICT[k]) != list:
+            resultDICT[k] = [resultDICT[k]] if resultDICT[k] else []
+        if type(lokiResultDICT[k]) == list:
+            resultDICT[k].extend(lokiResultDICT[k])
+        else:
+            resultDICT[k].append(lokiResultDICT[k])
+    return resultDICT
+
 def runLoki(inputLIST, filterLIST=[], refDICT={}):
     resultDICT = deepcopy(refDICT)
-    lokiRst = LokiResult(inputLIST, filterLIST)
-    if lokiRst.getStatus():
-        for index, key in enumerate(inputLIST):
-            lokiResultDICT = {k: [] for k in refDICT}
-            for resultIndex in range(0, lokiRst.getLokiLen(index)):
-                if lokiRst.getIntent(index, resultIndex) in lokiIntentDICT:
-                    lokiResultDICT = lokiIntentDICT[lokiRst.getIntent(index, resultIndex)].getResult(
-                        key, lokiRst.getUtterance(index, resultIndex), lokiRst.getArgs(index, resultIndex),
-                        lokiResultDICT, refDICT, pattern=lokiRst.getPattern(index, resultIndex))
-
-            # save lokiResultDICT to resultDICT
-            for k in lokiResultDICT:
-                if k not in resultDICT:
-                    resultDICT[k] = []
-                if type(resultDICT[k]) != list:
-                    resultDICT[k] = [resultDICT[k]] if resultDICT[k] else []
-                if type(lokiResultDICT[k]) == list:
-                    resultDICT[k].extend(lokiResultDICT[k])
-                else:
-                    resultDICT[k].append(lokiResultDICT[k])
+    lokiResultLIST, messageSTR = getLokiResultLIST(inputLIST, filterLIST, refDICT)
+    if lokiResultLIST is not None:
+        for lokiResultDICT in lokiResultLIST:
+            mergeLokiResult(resultDICT, lokiResultDICT)
     else:
-        resultDICT["msg"] = lokiRst.getMessage()
+        resultDICT["msg"] = messageSTR
     return resultDICT
 
-def execLoki(content, filterLIST=[], splitLIST=[], refDICT={}):
+def runLokiConcurrently(chunkLIST, filterLIST=[], refDICT={}, workerINT=LOKI_WORKER):
+    """
+    以最多 workerINT 條執行緒同時送出各批 chunkLIST，再依原本的順序合併結果。
+    與逐批執行相同：遇到第一個失敗的批次就寫入 "msg" 並停止合併，之後的批次結果全部捨棄。
+    各意圖收到的 refDICT 是呼叫者傳入的原始 refDICT，而非前面批次累積的結果。
+    """
+    resultDICT = deepcopy(refDICT)
+    executor = ThreadPoolExecutor(max_workers=workerINT)
+    try:
+        futureLIST = [executor.submit(getLokiResultLIST, chunk, filterLIST, refDICT) for chunk in chunkLIST]
+        for future in futureLIST:
+            lokiResultLIST, messageSTR = future.result()
+            if lokiResultLIST is None:
+                resultDICT["msg"] = messageSTR
+                break
+            for lokiResultDICT in lokiResultLIST:
+                mergeLokiResult(resultDICT, lokiResultDICT)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return resultDICT
+
+def execLoki(content, filterLIST=[], splitLIST=[], refDICT={}, workerINT=None):
     """
     input
         content       STR / STR[]    要執行 loki 分析的內容 (可以是字串或字串列表)
@@ -224,6 +504,7 @@ def execLoki(content, filterLIST=[], splitLIST=[], refDICT={}):
         splitLIST     STR[]          指定要斷句的符號 (空列表代表不指定)
                                      * 如果一句 content 內包含同一意圖的多個 utterance，請使用 splitLIST 切割 content
         refDICT       DICT           參考內容
+        workerINT     INT            同時送出的批次數上限 (None 代表使用 LOKI_WORKER；1 代表逐批執行)
 
     output
         resultDICT    DICT           合併 runLoki() 的結果
@@ -238,33 +519,54 @@ def execLoki(content, filterLIST=[], splitLIST=[], refDICT={}):
     if resultDICT is None:
         resultDICT = {}
 
+    contentLIST, inputLIST = getInputLIST(content, splitLIST)
+    if contentLIST:
+        # 依 INPUT_LIMIT 限制批次處理
+        if workerINT is None:
+            workerINT = LOKI_WORKER
+        chunkLIST = getChunkLIST(inputLIST)
+        if workerINT > 1 and len(chunkLIST) > 1:
+            resultDICT = runLokiConcurrently(chunkLIST, filterLIST=filterLIST, refDICT=resultDICT, workerINT=workerINT)
+        else:
+            for chunk in chunkLIST:
+                resultDICT = runLoki(chunk, filterLIST=filterLIST, refDICT=resultDICT)
+                if "msg" in resultDICT:
+                    break
+
+    if CHATBOT_MODE:
+        addChatbotResponse(resultDICT, contentLIST)
+
+    return resultDICT
+
+def getInputLIST(content, splitLIST=[]):
+    """
+    將 content 整理成 (contentLIST, inputLIST)。inputLIST 為依 splitLIST 切割並去除空字串後的句子。
+    """
     contentLIST = []
     if type(content) == str:
         contentLIST = [content]
     if type(content) == list:
         contentLIST = content
 
-    if contentLIST:
-        if splitLIST:
-            # 依 splitLIST 做分句切割
-            splitPAT = re.compile("[{}]".format("".join(splitLIST)))
-            inputLIST = []
-            for c in contentLIST:
-                tmpLIST = splitPAT.split(c)
-                inputLIST.extend(tmpLIST)
-            # 去除空字串
-            while "" in inputLIST:
-                inputLIST.remove("")
-        else:
-            # 不做分句切割處理
-            inputLIST = contentLIST
+    if splitLIST:
+        # 依 splitLIST 做分句切割
+        splitPAT = re.compile("[{}]".format("".join(splitLIST)))
+        inputLIST = []
+        for c in contentLIST:
+            tmpLIST = splitPAT.split(c)
+            inputLIST.extend(tmpLIST)
+        # 去除空字串
+        while "" in inputLIST:
+            inputLIST.remove("")
+    else:
+        # 不做分句切割處理
+        inputLIST = contentLIST
+    return contentLIST, inputLIST
 
-        # 依 INPUT_LIMIT 限制批次處理
-        for i in range(0, math.ceil(len(inputLIST) / INPUT_LIMIT)):
-            resultDICT = runLoki(inputLIST[i*INPUT_LIMIT:(i+1)*INPUT_LIMIT], filterLIST=filterLIST, refDICT=resultDICT)
-            if "msg" in resultDICT:
-                break
+def getChunkLIST(inputLIST):
+    return [inputLIST[i*INPUT_LIMIT:(i+1)*INPUT_LIMIT] for i in range(0, math.ceil(len(inputLIST) / INPUT_LIMIT))]
 
+def addChatbotResponse(resultDICT, contentLIST):
     if CHATBOT_MODE:
         if "response" not in resultDICT:
             resultDICT["response"] = []
@@ -290,6 +592,110 @@ def execLoki(content, filterLIST=[], splitLIST=[], refDICT={}):
 
     return resultDICT
 
+# ## 非同步 (asyncio) 版本 ######################################
+def makeAsyncSession(poolSizeINT=HTTP_POOL_SIZE):
+    """
+    建立共用的 aiohttp.ClientSession (需在 event loop 中呼叫)。連線數上限為 poolSizeINT，並套用 HTTP_TIMEOUT。
+    """
+    if aiohttp is None:
+        raise ImportError("aexecLoki() 需要安裝 aiohttp")
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=poolSizeINT),
+                                 timeout=aiohttp.ClientTimeout(sock_connect=HTTP_TIMEOUT[0], sock_read=HTTP_TIMEOUT[1]))
+
+async def apostLoki(session, payload):
+    """
+    送出 BulkAPI 請求，遇到 5xx 或連線錯誤時與 lokiSession 相同，以 HTTP_RETRY/HTTP_BACKOFF 退避重試。
+    output
+        statusCode    INT     HTTP 狀態碼
+        result        DICT    回應內容 (狀態碼不是 200 時為 None)
+    """
+    for retryINT in range(HTTP_RETRY + 1):
+        try:
+            async with session.post(LOKI_URL, json=payload) as response:
+                if response.status == codes.ok:
+                    return response.status, await response.json()
+                if response.status < 500 or retryINT == HTTP_RETRY:
+                    return response.status, None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if retryINT == HTTP_RETRY:
+                raise
+        await asyncio.sleep(HTTP_BACKOFF * 2 ** retryINT)
+
+async def aLokiResult(inputLIST, filterLIST, session):
+    lokiRst = LokiResult(inputLIST, filterLIST, fetch=False)
+    try:
+        missLIST = lokiRst.loadCache()
+        while missLIST:
+            statusCode, result = await apostLoki(session, lokiRst.getPayload(missLIST))
+            if statusCode == codes.ok:
+                missLIST = lokiRst.loadResponse(result)
+            else:
+                lokiRst.message = "{} Connection failed.".format(statusCode)
+                break
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        lokiRst.message = str(e)
+    return lokiRst
+
+async def agetLokiResultLIST(inputLIST, filterLIST=[], refDICT={}, session=None):
+    """
+    getLokiResultLIST() 的非同步版本。
+    """
+    lokiRst = await aLokiResult(inputLIST, filterLIST, session)
+    if not lokiRst.getStatus():
+        return None, lokiRst.getMessage()
+    return processLokiResult(lokiRst, inputLIST, refDICT), ""
+
+async def aexecLoki(content, filterLIST=[], splitLIST=[], refDICT={}, workerINT=None, session=None):
+    """
+    execLoki() 的非同步版本，參數與結果相同。
+
+    input
+        workerINT     INT            同時送出的批次數上限 (None 代表使用 LOKI_WORKER)。超過的批次會等待，不會一次全部送出
+        session       ClientSession  共用的 aiohttp.ClientSession (None 代表本次呼叫自行建立並關閉)
+
+    與 runLokiConcurrently() 相同：結果依原本順序合併，遇到第一個失敗的批次就寫入 "msg" 並停止；
+    呼叫端取消 (cancel) 時，尚未完成的請求也會一併取消。
+    """
+    if session is None:
+        async with makeAsyncSession() as session:
+            return await aexecLoki(content, filterLIST, splitLIST, refDICT, workerINT, session)
+
+    resultDICT = deepcopy(refDICT)
+    if resultDICT is None:
+        resultDICT = {}
+
+    contentLIST, inputLIST = getInputLIST(content, splitLIST)
+    if contentLIST:
+        if workerINT is None:
+            workerINT = LOKI_WORKER
+        semaphore = asyncio.Semaphore(max(1, workerINT))
+
+        async def runChunk(chunk):
+            async with semaphore:
+                return await agetLokiResultLIST(chunk, filterLIST, refDICT, session)
+
+        taskLIST = [asyncio.ensure_future(runChunk(chunk)) for chunk in getChunkLIST(inputLIST)]
+        try:
+            for task in taskLIST:
+                lokiResultLIST, messageSTR = await task
+                if lokiResultLIST is None:
+                    resultDICT["msg"] = messageSTR
+                    break
+                for lokiResultDICT in lokiResultLIST:
+                    mergeLokiResult(resultDICT, lokiResultDICT)
+        finally:
+            for task in taskLIST:
+                task.cancel()
+            # 等被取消的請求真正結束，避免留下未回收的 task (及其 "exception was never retrieved" 警告)
+            await asyncio.gather(*taskLIST, return_exceptions=True)
+
+    if CHATBOT_MODE:
+        await asyncio.to_thread(addChatbotResponse, resultDICT, contentLIST)
+
+    return resultDICT
+
 def testLoki(inputLIST, filterLIST):
     INPUT_LIMIT = 20
     for i in range(0, math.ceil(len(inputLIST) / INPUT_LIMIT)):
@@ -50,32 +50,36 @@ def getResponse(utterance, args):
 
     return resultSTR
 
+# utterance => 處理函式，於 import 時建立一次，getResult() 直接查表
+utteranceDICT = {}
+def register(*utteranceLIST):
+    def decorator(func):
+        for utteranceSTR in utteranceLIST:
+            utteranceDICT[utteranceSTR] = func
+        return func
+    return decorator
+
+@register("我希望")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern=""):
+    if CHATBOT_MODE:
+        resultDICT["response"] = getResponse(utterance, args)
+        resultDICT["source"] = "reply"
+    else:
+        resultDICT["CP"].append(args[1])
+    return resultDICT
+
+@register("我認為")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern=""):
+    if CHATBOT_MODE:
+        resultDICT["response"] = getResponse(utterance, args)
+        resultDICT["source"] = "reply"
+    else:
+        resultDICT["CP"].append(args[1])
+    return resultDICT
+
 def getResult(inputSTR, utterance, args, resultDICT, refDICT, pattern=""):
     debugInfo(inputSTR, utterance)
-    if utterance == "我希望":
-        if CHATBOT_MODE:
-            resultDICT["response"] = getResponse(utterance, args)
-            resultDICT["source"] = "reply"
-        else:
-<<<<<<< HEAD
-            resultDICT["CP"].append(args[1])
-=======
-            # write your code here
-            # resultDICT[key].append(value)
-            pass
->>>>>>> master
-
-    if utterance == "我認為":
-        if CHATBOT_MODE:
-            resultDICT["response"] = getResponse(utterance, args)
-            resultDICT["source"] = "reply"
-        else:
-<<<<<<< HEAD
-            resultDICT["CP"].append(args[1])
-=======
-            # write your code here
-            # resultDICT[key].append(value)
-            pass
->>>>>>> master
+    if utterance in utteranceDICT:
+        resultDICT = utteranceDICT[utterance](inputSTR, utterance, args, resultDICT, refDICT, pattern=pattern)
 
     return resultDICT
\ No newline at end of file
@@ -11,6 +11,10 @@
       並自動備份更新前的 Loki 意圖檔至 backup_{timestamp} 目錄中。
 
       注意：新增的 Loki 意圖檔需要使用者至 Project.py runLoki() 中加入呼叫程式碼！
+
+      意圖檔中的每個 utterance 以 @register("utterance") 註冊成獨立的處理函式，
+      getResult() 以 utteranceDICT 直接查表呼叫。舊版 if utterance == "..." 形式的意圖檔
+      會在更新時自動轉換成這種形式。
 """
 
 from argparse import ArgumentParser
@@ -27,10 +31,113 @@ USER_DEFINED_FILE = "USER_DEFINED.json"
 intentFilePAT = re.compile("^Loki_.+(?<!_updated)\.py$") #排除 1.0 產生的 _updted.py 檔案
 intentFileNamePAT = re.compile("^Loki_(.+)\.py$")
 chatbotModePAT = re.compile("^CHATBOT_MODE = (True|False)")
-utterancePAT = re.compile("if utterance == \".+\":$")
+utterancePAT = re.compile("^    if utterance == \"(.+)\":$")
+registerPAT = re.compile("^@register\\(\"(.+)\"\\)$")
+registryPAT = re.compile("^utteranceDICT = \\{\\}$")
+getResultPAT = re.compile("^def getResult\\((.*)\\):$")
 userDefinedPAT = re.compile("userDefinedDICT = (\{.*\})$")
 endResultPAT = re.compile("^    return resultDICT$")
 
+REGISTRY_SOURCE = """# utterance => 處理函式，於 import 時建立一次，getResult() 直接查表
+utteranceDICT = {}
+def register(*utteranceLIST):
+    def decorator(func):
+        for utteranceSTR in utteranceLIST:
+            utteranceDICT[utteranceSTR] = func
+        return func
+    return decorator
+
+"""
+
+def getUtteranceLIST(sourceLIST):
+    # 同時支援舊版 if utterance == "..." 與 @register("...") 兩種形式
+    utteranceLIST = []
+    for source in sourceLIST:
+        source = source.rstrip("\n")
+        for g in utterancePAT.finditer(source):
+            utteranceLIST.append(g.group(1))
+        for g in registerPAT.finditer(source):
+            utteranceLIST.append(g.group(1))
+    return utteranceLIST
+
+def getResultIndex(sourceLIST):
+    for i, source in enumerate(sourceLIST):
+        if getResultPAT.search(source.rstrip("\n")):
+            return i
+    return None
+
+def makeDispatchCall(paramSTR):
+    # 將 getResult() 的參數列轉成呼叫處理函式的引數
+    argLIST = []
+    for param in paramSTR.split(","):
+        nameSTR = param.split("=")[0].strip()
+        if "=" in param:
+            argLIST.append("{0}={0}".format(nameSTR))
+        else:
+            argLIST.append(nameSTR)
+    return ", ".join(argLIST)
+
+def makeHandler(utteranceSTR, paramSTR, bodyLIST):
+    return ["@register(\"{}\")\n".format(utteranceSTR),
+            "def _({}):\n".format(paramSTR)] + bodyLIST + ["    return resultDICT\n", "\n"]
+
+def makeNewHandler(utteranceSTR, paramSTR, chatbotBOOL):
+    if chatbotBOOL:
+        bodyLIST = ["    if CHATBOT_MODE:\n",
+                    "        resultDICT[\"response\"] = getResponse(utterance, args)\n",
+                    "    else:\n",
+                    "        # write your code here\n",
+                    "        pass\n"]
+    else:
+        bodyLIST = ["    # write your code here\n"]
+    return makeHandler(utteranceSTR, paramSTR, bodyLIST)
+
+def convertIntent(sourceLIST):
+    """
+    把舊版 getResult() 中逐一比對的 if utterance == "..." 區塊轉成 @register 處理函式，
+    getResult() 改為查 utteranceDICT 呼叫。已經是新形式或找不到 getResult() 的檔案原樣回傳。
+    """
+    defINT = getResultIndex(sourceLIST)
+    if defINT is None:
+        return sourceLIST
+    endLIST = [i for i in range(defINT, len(sourceLIST)) if endResultPAT.search(sourceLIST[i].rstrip("\n"))]
+    if not endLIST:
+        return sourceLIST
+    endINT = endLIST[0]
+
+    headLIST = []
+    blockLIST = []
+    for source in sourceLIST[defINT+1:endINT]:
+        utterance = utterancePAT.search(source.rstrip("\n"))
+        if utterance:
+            blockLIST.append((utterance.group(1), []))
+        elif blockLIST:
+            # 區塊內容少縮排一層
+            blockLIST[-1][1].append(source[4:] if source.startswith("    ") else source)
+        else:
+            headLIST.append(source)
+    if not blockLIST:
+        return sourceLIST
+
+    paramSTR = getResultPAT.search(sourceLIST[defINT].rstrip("\n")).group(1)
+    handlerLIST = []
+    if not any(registryPAT.search(source.rstrip("\n")) for source in sourceLIST):
+        if defINT > 0 and sourceLIST[defINT-1].strip() != "":
+            handlerLIST.append("\n")
+        handlerLIST.append(REGISTRY_SOURCE)
+    for utteranceSTR, bodyLIST in blockLIST:
+        while bodyLIST and bodyLIST[-1].strip() == "":
+            bodyLIST = bodyLIST[:-1]
+        handlerLIST.extend(makeHandler(utteranceSTR, paramSTR, bodyLIST))
+
+    while headLIST and headLIST[-1].strip() == "":
+        headLIST = headLIST[:-1]
+    dispatchLIST = [sourceLIST[defINT]] + headLIST + [
+        "    if utterance in utteranceDICT:\n",
+        "        resultDICT = utteranceDICT[utterance]({})\n".format(makeDispatchCall(paramSTR)),
+        "\n"]
+    return sourceLIST[:defINT] + handlerLIST + dispatchLIST + sourceLIST[endINT:]
+
 
 def updateUtterance(newIntentPath):
     # 取得目前目錄下的 intent
@@ -48,49 +155,31 @@ def updateUtterance(newIntentPath):
             while sourceLIST[-1] == "\n":
                 sourceLIST = sourceLIST[:-1]
 
+            # 舊版 if utterance == "..." 形式先轉換成 @register 形式
+            convertedLIST = convertIntent(sourceLIST)
+            updatedBOOL = convertedLIST != sourceLIST
+            if updatedBOOL:
+                print("=> 轉換為 utteranceDICT 查表形式")
+            sourceLIST = convertedLIST
+
             # 取出舊 intent 中的句型
-            intentLIST = []
             chatbotBOOL = False
             for source in sourceLIST:
                 if chatbotModePAT.search(source):
                     chatbotBOOL = True
-                for g in utterancePAT.finditer(source):
-                    intentLIST.append(g.group())
+            intentLIST = getUtteranceLIST(sourceLIST)
 
             # 取出新 intent 中的句型
-            newIntentLIST = []
             with open(os.path.join(newIntentPath, intentFile), encoding="utf-8") as f:
-                lineLIST = f.readlines()
-                for line in lineLIST:
-                    for g in utterancePAT.finditer(line):
-                        newIntentLIST.append(g.group())
+                newIntentLIST = getUtteranceLIST(f.readlines())
 
-            # 新 intent 中的句型不存在於舊 intent 裡才更新
-            updatedBOOL = False
+            # 新 intent 中的句型不存在於舊 intent 裡才更新，新的處理函式加在 getResult() 之前
             for newIntent in newIntentLIST:
                 if newIntent not in intentLIST:
-                    indexLIST = [i for i, source in enumerate(sourceLIST) if utterancePAT.search(source)]
-                    if indexLIST:
-                        indexINT = indexLIST[-1]
-                    else:
-                        indexLIST = [i for i, source in enumerate(sourceLIST) if endResultPAT.search(source)]
-                        indexINT = indexLIST[-1]
-
-                    if chatbotBOOL:
-                        sourceLIST.insert(indexINT, """    {}
-        if CHATBOT_MODE:
-            resultDICT["response"] = getResponse(utterance, args)
-        else:
-            # write your code here
-            pass
-
-""".format(newIntent))
-                    else:
-                        sourceLIST.insert(indexINT, """    {}
-        # write your code here
-        pass
-
-""".format(newIntent))
+                    indexINT = getResultIndex(sourceLIST)
+                    paramSTR = getResultPAT.search(sourceLIST[indexINT].rstrip("\n")).group(1)
+                    sourceLIST[indexINT:indexINT] = makeNewHandler(newIntent, paramSTR, chatbotBOOL)
+                    intentLIST.append(newIntent)
 
                     updatedBOOL = True
                     print("=> 新增 {}".format(newIntent))
@@ -116,7 +205,10 @@ def updateUtterance(newIntentPath):
             # 新 intent 直接複製
             print("\n[新增 {}]".format(intentFile))
             try:
-                copyfile(os.path.join(newIntentPath, intentFile), os.path.join(BASE_PATH, intentFile))
+                with open(os.path.join(newIntentPath, intentFile), encoding="utf-8") as f:
+                    sourceLIST = convertIntent(f.readlines())
+                with open(os.path.join(BASE_PATH, intentFile), "w", encoding="utf-8") as f:
+                    f.write("".join(sourceLIST))
                 intentNameSTR = intentFileNamePAT.findall(intentFile)[0]
                 print("=> 請在 Project.py 中加入以下的程式碼")
                 print("from intent import Loki_{}\n".format(intentNameSTR))
@@ -5,11 +5,20 @@ from importlib.util import module_from_spec
 from importlib.util import spec_from_file_location
 import json
 import os
+import sys
 
 def import_from_path(module_name, file_path):
+    # 同一個 lib 模組 (例如 merge_lib_Account) 只載入一次，main 與各意圖共用
+    if module_name in sys.modules:
+        return sys.modules[module_name]
     spec = spec_from_file_location(module_name, file_path)
     module = module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
     return module
 
 CWD_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -14,6 +14,9 @@
 
     Output:
         resultDICT    dict
+
+    refDICT 若含有 "final_input"，每個 "final" 結果都會同步記錄它來自哪一句 inputSTR，
+    讓一次送出多句的呼叫者 (例如 Bonsai.bbtree_batch()) 能把結果對回各句。
 """
 
 from importlib.util import module_from_spec
@@ -21,14 +24,23 @@ from importlib.util import spec_from_file_location
 from random import sample
 import json
 import os
+import sys
 
 INTENT_NAME = "head_final"
 CWD_PATH = os.path.dirname(os.path.abspath(__file__))
 
 def import_from_path(module_name, file_path):
+    # 同一個 lib 模組 (例如 merge_lib_Account) 只載入一次，main 與各意圖共用
+    if module_name in sys.modules:
+        return sys.modules[module_name]
     spec = spec_from_file_location(module_name, file_path)
     module = module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
     return module
 
 MODULE_DICT = {
@@ -87,79 +99,112 @@ def getReply(utterance, args):
     return replySTR
 
 getResponse = getReply
+
+# utterance => 處理函式，於 import 時建立一次，getResult() 直接查表
+utteranceDICT = {}
+def register(*utteranceLIST):
+    def decorator(func):
+        for utteranceSTR in utteranceLIST:
+            utteranceDICT[utteranceSTR] = func
+        return func
+    return decorator
+
+@register("一個軍人")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("不是")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("他哥哥")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("程式語言")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("簡單生活")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("那個軍人")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("銷售經理")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
+@register("國中的學生")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["final"].append(args[0])
+    return resultDICT
+
 def getResult(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
     debugInfo(inputSTR, utterance)
-    if utterance == "一個軍人":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "不是":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "他哥哥":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "程式語言":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "簡單生活":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "那個軍人":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "銷售經理":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
-
-    if utterance == "國中的學生":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["final"].append(args[0])
+    if utterance in utteranceDICT:
+        countINT = len(resultDICT.get("final", []))
+        resultDICT = utteranceDICT[utterance](inputSTR, utterance, args, resultDICT, refDICT, pattern=pattern, toolkitDICT=toolkitDICT)
+        # 多句一起送出時，替這次新增的 "final" 記下來源句子
+        if "final_input" in resultDICT:
+            resultDICT["final_input"].extend([inputSTR] * (len(resultDICT.get("final", [])) - countINT))
 
     return resultDICT
 
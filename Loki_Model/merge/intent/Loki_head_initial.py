@@ -14,6 +14,9 @@
 
     Output:
         resultDICT    dict
+
+    refDICT 若含有 "initial_input"，每個 "initial" 結果都會同步記錄它來自哪一句 inputSTR，
+    讓一次送出多句的呼叫者 (例如 Bonsai.bbtree_batch()) 能把結果對回各句。
 """
 
 from importlib.util import module_from_spec
@@ -21,14 +24,23 @@ from importlib.util import spec_from_file_location
 from random import sample
 import json
 import os
+import sys
 
 INTENT_NAME = "head_initial"
 CWD_PATH = os.path.dirname(os.path.abspath(__file__))
 
 def import_from_path(module_name, file_path):
+    # 同一個 lib 模組 (例如 merge_lib_Account) 只載入一次，main 與各意圖共用
+    if module_name in sys.modules:
+        return sys.modules[module_name]
     spec = spec_from_file_location(module_name, file_path)
     module = module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
     return module
 
 MODULE_DICT = {
@@ -87,25 +99,46 @@ def getReply(utterance, args):
     return replySTR
 
 getResponse = getReply
+
+# utterance => 處理函式，於 import 時建立一次，getResult() 直接查表
+utteranceDICT = {}
+def register(*utteranceLIST):
+    def decorator(func):
+        for utteranceSTR in utteranceLIST:
+            utteranceDICT[utteranceSTR] = func
+        return func
+    return decorator
+
+@register("一個軍人是專業的")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["initial"].append(args[0])
+    return resultDICT
+
+@register("那個軍人是專業的")
+def _(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
+    if CHATBOT:
+        replySTR = getReply(utterance, args)
+        if replySTR:
+            resultDICT["response"] = replySTR
+            resultDICT["source"] = "reply"
+    else:
+        resultDICT["initial"].append(args[0])
+    return resultDICT
+
 def getResult(inputSTR, utterance, args, resultDICT, refDICT, pattern="", toolkitDICT={}):
     debugInfo(inputSTR, utterance)
-    if utterance == "一個軍人是專業的":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["initial"].append(args[0])
-
-    if utterance == "那個軍人是專業的":
-        if CHATBOT:
-            replySTR = getReply(utterance, args)
-            if replySTR:
-                resultDICT["response"] = replySTR
-                resultDICT["source"] = "reply"
-        else:
-            resultDICT["initial"].append(args[0])
+    if utterance in utteranceDICT:
+        countINT = len(resultDICT.get("initial", []))
+        resultDICT = utteranceDICT[utterance](inputSTR, utterance, args, resultDICT, refDICT, pattern=pattern, toolkitDICT=toolkitDICT)
+        # 多句一起送出時，替這次新增的 "initial" 記下來源句子
+        if "initial_input" in resultDICT:
+            resultDICT["initial_input"].extend([inputSTR] * (len(resultDICT.get("initial", [])) - countINT))
 
     return resultDICT
 
@@ -3,13 +3,23 @@
 
 from importlib.util import module_from_spec
 from importlib.util import spec_from_file_location
+import asyncio
 import os
 import re
+import sys
 
 def import_from_path(module_name, file_path):
+    # 同一個 lib 模組 (例如 merge_lib_Account) 只載入一次，main 與各意圖共用
+    if module_name in sys.modules:
+        return sys.modules[module_name]
     spec = spec_from_file_location(module_name, file_path)
     module = module_from_spec(spec)
-    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
     return module
 
 CWD_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -37,6 +47,8 @@ getLLM = MODULE_DICT["LLM"].getLLM
 COMM_TEST = MODULE_DICT["Project"].COMM_TEST
 cosSimilarLoki = MODULE_DICT["Project"].cosSimilarLoki
 execLoki = MODULE_DICT["Project"].execLoki
+# 較舊的 lib/Project.py 沒有非同步版本，aaskLoki() 會改在執行緒中呼叫 execLoki
+aexecLoki = getattr(MODULE_DICT["Project"], "aexecLoki", None)
 
 
 #============== Function ==============
@@ -81,6 +93,25 @@ def askLoki(content, **kwargs):
     resultDICT = execLoki(content, filterLIST=filterLIST, splitLIST=splitLIST, refDICT=refDICT, toolkitDICT=toolkitDICT)
     return resultDICT
 
+async def aaskLoki(content, **kwargs):
+    """
+    askLoki() 的非同步版本，參數與結果相同。
+
+    lib/Project.py 提供 aexecLoki() 時直接在 event loop 上執行 (可另外傳入 workerINT、session)，
+    否則改以 asyncio.to_thread() 呼叫 execLoki()，不會阻塞 event loop。
+    """
+    filterLIST = kwargs["filterLIST"] if "filterLIST" in kwargs else []
+    splitLIST = kwargs["splitLIST"] if "splitLIST" in kwargs else []
+    refDICT = kwargs["refDICT"] if "refDICT" in kwargs else {}
+    toolkitDICT = kwargs["toolkitDICT"] if "toolkitDICT" in kwargs else {}
+
+    if aexecLoki:
+        asyncKwargs = {k: kwargs[k] for k in ("workerINT", "session") if k in kwargs}
+        resultDICT = await aexecLoki(content, filterLIST=filterLIST, splitLIST=splitLIST, refDICT=refDICT, toolkitDICT=toolkitDICT, **asyncKwargs)
+    else:
+        resultDICT = await asyncio.to_thread(execLoki, content, filterLIST=filterLIST, splitLIST=splitLIST, refDICT=refDICT, toolkitDICT=toolkitDICT)
+    return resultDICT
+
 def askLLM(system="", assistant="", user=""):
     """
     input
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+"""
+名稱： Bonsai 句法樹表示法效能測試
+範例： python -m benchmark --length 10 100 1000 --shape right left balanced random --json result.json --csv result.csv
+說明： 比較 Graph (treeMaker / ccommandWithTree)、SET (setMaker / ccommandWithSet)、
+      Constituent Algebra (algMaker、algMaskMaker / ccommandWithAlg) 以及 TreeIndex / ccommandMatrix()
+      在不同句長與樹形下的建樹時間、c-command 查詢時間與記憶體用量。
+
+      時間以 timeit (perf_counter) 量測：先暖身 warmup 次，再以 timeit 的 autorange 決定每輪呼叫次數，
+      重複 repeat 輪後取最佳值、中位數、平均與標準差 (皆為單次呼叫的秒數)。
+      記憶體另外以 tracemalloc 單獨呼叫一次量測 (避免 tracemalloc 拖慢計時)，記錄配置的峰值 (byte)。
+
+      樹形：
+          right    : 右向分支 (treeMaker() / setMaker() / algMaker() 產生的形狀)
+          left     : 左向分支
+          balanced : 平衡二元樹
+          random   : 隨機切分 (以 --seed 固定)
+      右向分支以外的樹形，SET 與 Constituent Algebra 表示法由 Graph 轉換而來，不量測建樹時間。
+      查詢固定為 w1 是否 c-command 最後一個字 wn。
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from statistics import mean, median, stdev
+import csv
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+import Bonsai
+
+SHAPE_LIST = ["right", "left", "balanced", "random"]
+FIELD_LIST = ["case", "representation", "shape", "length", "number", "repeat",
+              "best", "median", "mean", "stdev", "peak_memory", "result", "error"]
+
+def makeSentence(lengthINT):
+    return "".join(f"w{i + 1}" for i in range(lengthINT))
+
+def makeTree(lengthINT, shapeSTR, seed=0):
+    """
+    產生 treeMaker() 形式的樹 {node: {child, ...}}；根節點為 node1，節點依前序編號。
+    """
+    if shapeSTR == "right":
+        return Bonsai.treeMaker(makeSentence(lengthINT))
+
+    rng = random.Random(seed)
+    def split(lo, hi):
+        if shapeSTR == "left":
+            return hi - 1
+        if shapeSTR == "balanced":
+            return (lo + hi) // 2
+        if shapeSTR == "random":
+            return rng.randint(lo + 1, hi - 1)
+        raise ValueError(f"Unknown shape: {shapeSTR}")
+
+    treeDICT = {}
+    if lengthINT < 2:
+        return treeDICT
+    # (lo, hi, parent)：涵蓋 w{lo+1} ~ w{hi} 的成分；以堆疊取代遞迴，長句的左向分支也不受遞迴深度限制
+    stack = [(0, lengthINT, None)]
+    while stack:
+        lo, hi, parentSTR = stack.pop()
+        if hi - lo == 1:
+            treeDICT[parentSTR].add(f"w{hi}")
+            continue
+        nodeSTR = f"node{len(treeDICT) + 1}"
+        treeDICT[nodeSTR] = set()
+        if parentSTR is not None:
+            treeDICT[parentSTR].add(nodeSTR)
+        mid = split(lo, hi)
+        stack.append((mid, hi, nodeSTR))
+        stack.append((lo, mid, nodeSTR))
+    return treeDICT
+
+def treeToSet(treeDICT):
+    """
+    把 Graph 轉成 setMaker() 形式的巢狀 frozenset。
+    """
+    root = Bonsai.find_root(treeDICT)
+    if root is None:
+        return set()
+    setDICT = {}
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if node not in treeDICT:
+            setDICT[node] = node
+        elif visited:
+            setDICT[node] = frozenset(setDICT[c] for c in treeDICT[node])
+        else:
+            stack.append((node, True))
+            stack.extend((c, False) for c in treeDICT[node])
+    return {setDICT[root]}
+
+def treeToAlg(treeDICT):
+    """
+    把 Graph 轉成 algMaker() 形式：每個字對應到它母節點 (包含它與它的姊妹成分) 的 {"wi", "Bi", "+", ...}。
+    """
+    index = Bonsai.TreeIndex(treeDICT)
+    resultDICT = {}
+    for word in Bonsai.getLeafLIST(index):
+        parentSTR = index.parent(word)
+        p = index.idDICT[parentSTR]
+        algSET = {"+"}
+        for node in index.nodeLIST[p:index.endLIST[p] + 1]:
+            if node not in treeDICT:
+                algSET.add(node)
+                algSET.add(f"B{node[1:]}")
+        resultDICT[word] = algSET
+    return resultDICT
+
+def measure(func, repeatINT=5, warmupINT=1, minTimeFLOAT=0.2):
+    """
+    return: 單次呼叫的秒數統計 (best, median, mean, stdev)、每輪呼叫次數與最後一次呼叫的結果
+    """
+    for _ in range(warmupINT):
+        result = func()
+    timer = timeit.Timer(func)
+    numberINT, _ = timer.autorange()
+    numberINT = max(1, int(numberINT * minTimeFLOAT / 0.2))
+    timeLIST = [t / numberINT for t in timer.repeat(repeat=repeatINT, number=numberINT)]
+    return {
+        "number": numberINT,
+        "repeat": repeatINT,
+        "best": min(timeLIST),
+        "median": median(timeLIST),
+        "mean": mean(timeLIST),
+        "stdev": stdev(timeLIST) if len(timeLIST) > 1 else 0.0,
+        "result": result
+    }
+
+def measureMemory(func):
+    tracemalloc.start()
+    try:
+        func()
+        _, peakINT = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peakINT
+
+def getResult(valueOBJ):
+    if isinstance(valueOBJ, bool):
+        return valueOBJ
+    if hasattr(valueOBJ, "sum"):
+        return int(valueOBJ.sum())
+    return None
+
+def makeCaseLIST(lengthINT, shapeSTR, seed=0):
+    """
+    return: [(case, representation, func), ...]
+    """
+    sentenceSTR = makeSentence(lengthINT)
+    lastSTR = f"w{lengthINT}"
+    treeDICT = makeTree(lengthINT, shapeSTR, seed)
+    if shapeSTR == "right":
+        inputSET = Bonsai.setMaker(sentenceSTR)
+        inputDICT = Bonsai.algMaker(sentenceSTR)
+        algMask = Bonsai.algMaskMaker(sentenceSTR)
+    else:
+        inputSET = treeToSet(treeDICT)
+        inputDICT = treeToAlg(treeDICT)
+        algMask = Bonsai.AlgebraMask.fromDICT(inputDICT)
+    index = Bonsai.TreeIndex(treeDICT)
+
+    caseLIST = []
+    if shapeSTR == "right":
+        caseLIST.extend([
+            ("build", "tree", lambda: Bonsai.treeMaker(sentenceSTR)),
+            ("build", "set", lambda: Bonsai.setMaker(sentenceSTR)),
+            ("build", "alg", lambda: Bonsai.algMaker(sentenceSTR)),
+            ("build", "algmask", lambda: Bonsai.algMaskMaker(sentenceSTR)),
+        ])
+    caseLIST.extend([
+        ("build", "index", lambda: Bonsai.TreeIndex(treeDICT)),
+        ("query", "tree", lambda: Bonsai.ccommandWithTree(treeDICT, "w1", lastSTR)),
+        ("query", "set", lambda: Bonsai.ccommandWithSet(inputSET, "w1", lastSTR)),
+        ("query", "alg", lambda: Bonsai.ccommandWithAlg(inputDICT, "w1", {lastSTR})),
+        ("query", "algmask", lambda: Bonsai.ccommandWithAlg(algMask, "w1", {lastSTR})),
+        ("query", "index", lambda: index.ccommands("w1", lastSTR)),
+    ])
+    if Bonsai.np is not None:
+        caseLIST.append(("all_pairs", "index", lambda: Bonsai.ccommandMatrix(index)[0]))
+    return caseLIST
+
+def runBenchmark(lengthLIST, shapeLIST, repeatINT=5, warmupINT=1, minTimeFLOAT=0.2, seed=0, verbose=True):
+    rowLIST = []
+    for shapeSTR in shapeLIST:
+        for lengthINT in lengthLIST:
+            for caseSTR, representationSTR, func in makeCaseLIST(lengthINT, shapeSTR, seed):
+                rowDICT = {"case": caseSTR, "representation": representationSTR, "shape": shapeSTR, "length": lengthINT}
+                try:
+                    statDICT = measure(func, repeatINT, warmupINT, minTimeFLOAT)
+                    statDICT["result"] = getResult(statDICT["result"])
+                    rowDICT.update(statDICT)
+                    rowDICT["peak_memory"] = measureMemory(func)
+                except Exception as e:
+                    # 某個表示法不支援某種樹形時記錄下來，不中斷整個測試
+                    rowDICT["error"] = f"{type(e).__name__}: {e}"
+                rowLIST.append(rowDICT)
+                if verbose:
+                    printRow(rowDICT)
+    return rowLIST
+
+def printRow(rowDICT):
+    if "error" in rowDICT:
+        print(f"{rowDICT['shape']:<9}{rowDICT['length']:>6}  {rowDICT['case']:<10}{rowDICT['representation']:<6}  {rowDICT['error']}")
+    else:
+        print(f"{rowDICT['shape']:<9}{rowDICT['length']:>6}  {rowDICT['case']:<10}{rowDICT['representation']:<6}"
+              f"{rowDICT['best'] * 1e6:>14.3f} µs{rowDICT['median'] * 1e6:>14.3f} µs{rowDICT['peak_memory']:>12} B")
+
+def getMetaDICT():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "numpy": getattr(Bonsai.np, "__version__", None)
+    }
+
+def writeJSON(rowLIST, jsonFILE, argDICT=None):
+    with open(jsonFILE, "w", encoding="utf-8") as f:
+        json.dump({"meta": getMetaDICT(), "args": argDICT or {}, "results": rowLIST}, f, ensure_ascii=False, indent=4)
+
+def writeCSV(rowLIST, csvFILE):
+    with open(csvFILE, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELD_LIST)
+        writer.writeheader()
+        for rowDICT in rowLIST:
+            writer.writerow({k: rowDICT.get(k, "") for k in FIELD_LIST})
+
+
+if __name__ == "__main__":
+    argParser = ArgumentParser(prog="python -m benchmark", description="Benchmark Bonsai tree representations.")
+    argParser.add_argument("-l", "--length", nargs="+", type=int, default=[10, 100, 1000], help="Sentence lengths", dest="lengthLIST")
+    argParser.add_argument("-s", "--shape", nargs="+", choices=SHAPE_LIST, default=SHAPE_LIST, help="Tree shapes", dest="shapeLIST")
+    argParser.add_argument("-r", "--repeat", type=int, default=5, help="Timing repetitions", dest="repeatINT")
+    argParser.add_argument("-w", "--warmup", type=int, default=1, help="Warmup calls before timing", dest="warmupINT")
+    argParser.add_argument("-t", "--min-time", type=float, default=0.2, help="Minimum seconds per repetition", dest="minTimeFLOAT")
+    argParser.add_argument("--seed", type=int, default=0, help="Seed for the random shape", dest="seed")
+    argParser.add_argument("--json", default="", help="Write results to a JSON file", dest="jsonFILE")
+    argParser.add_argument("--csv", default="", help="Write results to a CSV file", dest="csvFILE")
+    args = argParser.parse_args()
+
+    print(f"{'shape':<9}{'length':>6}  {'case':<10}{'repr':<6}{'best':>17}{'median':>17}{'peak':>14}")
+    rowLIST = runBenchmark(args.lengthLIST, args.shapeLIST, args.repeatINT, args.warmupINT, args.minTimeFLOAT, args.seed)
+    if args.jsonFILE:
+        writeJSON(rowLIST, args.jsonFILE, vars(args))
+        print(f"JSON => {args.jsonFILE}")
+    if args.csvFILE:
+        writeCSV(rowLIST, args.csvFILE)
+        print(f"CSV => {args.csvFILE}")
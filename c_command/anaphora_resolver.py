@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding:utf-8 -*-
 
-from dataclasses import dataclass, field
-from typing import Dict, Set, Optional, List, Tuple, Any
+from dataclasses import dataclass
+from typing import Dict, Set, Optional, List, Tuple, Any, Iterator
 from enum import Enum
 from copy import deepcopy
 
@@ -62,20 +62,115 @@ class Trace:
     base_position_node: int
     surface_position_node: int
 
-@dataclass
 class CompressedNode:
-    label: str
-    node_id: int
-    dominated_referents: Dict[str, Referent] = field(default_factory=dict)
-    children: List['CompressedNode'] = field(default_factory=list)
-    parent: Optional['CompressedNode'] = None
-    vp_content: Optional[Dict] = None
-    is_vp_ellipsis: bool = False
-    ellipsis_info: Optional[VPEllipsis] = None
-    traces: List[Trace] = field(default_factory=list)  # Traces at this position
+    """A syntactic node. Nodes compare and hash by identity, so they can be used in sets and dicts.
+
+    freeze() numbers every node of a tree in preorder and postorder, builds a node_id index and
+    caches each node's local domain; once a tree is frozen, dominates() and c_commands() are O(1)
+    interval checks, a c-command domain is two preorder ranges and node lookups by id are dict
+    lookups. Assigning parent or children, or calling add_referent(), thaws the tree (the parent
+    chain is walked until it is frozen again); in-place edits of a children list or of
+    dominated_referents are not seen, so pair them with a parent assignment or use
+    AnaphoraResolver.add_child() / add_referent().
+    """
+    __slots__ = ("label", "node_id", "dominated_referents", "_children", "_parent", "vp_content",
+                 "is_vp_ellipsis", "ellipsis_info", "traces", "_pre", "_post", "_depth", "_order", "_ids",
+                 "_domain")
+
+    def __init__(self, label: str, node_id: int,
+                 dominated_referents: Optional[Dict[str, Referent]] = None,
+                 children: Optional[List['CompressedNode']] = None,
+                 parent: Optional['CompressedNode'] = None,
+                 vp_content: Optional[Dict] = None,
+                 is_vp_ellipsis: bool = False,
+                 ellipsis_info: Optional[VPEllipsis] = None,
+                 traces: Optional[List[Trace]] = None):
+        self.label = label
+        self.node_id = node_id
+        self.dominated_referents = {} if dominated_referents is None else dominated_referents
+        self._order: Optional[List['CompressedNode']] = None  # Preorder list shared by a frozen tree
+        self._ids: Optional[Dict[int, 'CompressedNode']] = None  # node_id -> node, shared by a frozen tree
+        self._domain: Optional['CompressedNode'] = None  # Nearest TP/CP at or above, cached by freeze()
+        self._children: List['CompressedNode'] = []
+        self._parent: Optional['CompressedNode'] = None
+        self.children = [] if children is None else children
+        self.parent = parent
+        self.vp_content = vp_content
+        self.is_vp_ellipsis = is_vp_ellipsis
+        self.ellipsis_info = ellipsis_info
+        self.traces = [] if traces is None else traces  # Traces at this position
+        self._pre = -1
+        self._post = -1
+        self._depth = 0
+
+    def __repr__(self) -> str:
+        return f"CompressedNode(label={self.label!r}, node_id={self.node_id!r})"
+
+    @property
+    def parent(self) -> Optional['CompressedNode']:
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent: Optional['CompressedNode']):
+        self._thaw()
+        if parent is not None:
+            parent._thaw()
+        self._parent = parent
+
+    @property
+    def children(self) -> List['CompressedNode']:
+        return self._children
+
+    @children.setter
+    def children(self, children: List['CompressedNode']):
+        self._thaw()
+        self._children = children
+
+    def _thaw(self):
+        """Drop the numbering and caches of the frozen tree self belongs to"""
+        order = self._order
+        if order is None:
+            return
+        for node in order:
+            node._order = None
+            node._ids = None
+            node._domain = None
+
+    def freeze(self) -> List['CompressedNode']:
+        """Number the subtree under self (normally the root) and return its nodes in preorder"""
+        order: List['CompressedNode'] = []
+        ids: Dict[int, 'CompressedNode'] = {}
+        outer = self._parent
+        while outer is not None and outer.label not in ['TP', 'CP']:
+            outer = outer._parent
+        post = 0
+        stack = [(self, 0, outer, False)]
+        while stack:
+            node, depth, domain, visited = stack.pop()
+            if visited:
+                node._post = post
+                post += 1
+                continue
+            if node.label in ['TP', 'CP']:
+                domain = node
+            node._pre = len(order)
+            node._depth = depth
+            node._order = order
+            node._ids = ids
+            node._domain = domain
+            ids.setdefault(node.node_id, node)  # Keep the first node in preorder, as a DFS would
+            order.append(node)
+            stack.append((node, depth, domain, True))
+            stack.extend((child, depth + 1, domain, False) for child in reversed(node._children))
+        return order
+
+    def _last(self) -> int:
+        # Preorder number of the last node in the subtree: size - 1 == post - pre + depth
+        return self._post + self._depth
 
     def add_referent(self, referent: Referent):
         self.dominated_referents[referent.name] = referent
+        self._thaw()  # So a resolver over this tree rebuilds its referent registry
 
     def add_trace(self, trace: Trace):
         """Add a trace for a moved element"""
@@ -96,32 +191,55 @@ class CompressedNode:
         return (self.parent.dominates(other) and not self.dominates(other))
 
     def dominates(self, other: 'CompressedNode') -> bool:
-        if self == other:
-            return True
-        for child in self.children:
-            if child.dominates(other):
+        if self._order is not None and self._order is other._order:
+            return self._pre <= other._pre and other._post <= self._post
+        current = other
+        while current is not None:
+            if current is self:
                 return True
+            current = current.parent
         return False
 
     def get_c_command_domain(self) -> Set['CompressedNode']:
-        if self.parent is None:
-            return set()
-
-        c_commanded = set()
-        for sibling in self.parent.children:
-            if sibling != self:
-                c_commanded.add(sibling)
-                c_commanded.update(self._get_all_descendants(sibling))
-        return c_commanded
+        return set(self.iter_c_command_domain())
+
+    def get_c_command_ranges(self) -> Optional[List[Tuple[int, int]]]:
+        """The c-command domain as half-open ranges into the frozen preorder list, None if not frozen"""
+        parent = self._parent
+        if parent is None:
+            return []
+        if self._order is None or self._order is not parent._order:
+            return None
+        # The parent's subtree minus the parent itself and self's subtree
+        return [(parent._pre + 1, self._pre), (self._last() + 1, parent._last() + 1)]
+
+    def iter_c_command_domain(self) -> Iterator['CompressedNode']:
+        """Nodes of the c-command domain, read off the preorder ranges when the tree is frozen"""
+        ranges = self.get_c_command_ranges()
+        if ranges is not None:
+            order = self._order
+            for start, stop in ranges:
+                for i in range(start, stop):
+                    yield order[i]
+            return
+
+        for sibling in self._parent.children:
+            if sibling is not self:
+                yield sibling
+                yield from self._get_all_descendants(sibling)
 
     def _get_all_descendants(self, node: 'CompressedNode') -> Set['CompressedNode']:
         descendants = set()
-        for child in node.children:
+        stack = list(node.children)
+        while stack:
+            child = stack.pop()
             descendants.add(child)
-            descendants.update(self._get_all_descendants(child))
+            stack.extend(child.children)
         return descendants
 
     def get_local_domain(self) -> 'CompressedNode':
+        if self._order is not None:
+            return self._domain or self
         current = self
         while current is not None:
             if current.label in ['TP', 'CP']:
@@ -142,12 +260,16 @@ class CompressedNode:
         return None
 
     def _find_node_by_id_in_subtree(self, target_id: int) -> Optional['CompressedNode']:
-        if self.node_id == target_id:
-            return self
-        for child in self.children:
-            result = child._find_node_by_id_in_subtree(target_id)
-            if result:
-                return result
+        if self._ids is not None:
+            node = self._ids.get(target_id)
+            if node is not None and self.dominates(node):
+                return node
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.node_id == target_id:
+                return node
+            stack.extend(reversed(node.children))
         return None
 
 class AnaphoraResolver:
@@ -156,10 +278,110 @@ class AnaphoraResolver:
         self.discourse_referents: List[Referent] = []
         self.discourse_conditions: List[Tuple[Referent, Referent]] = []  # For donkey anaphora
         self.vp_ellipsis_sites: List[VPEllipsis] = []
+        self.node_index: Dict[int, CompressedNode] = {}
+        # Referent registry: name -> referent, as the tree-wide merge of dominated_referents
+        self.referents: Dict[str, Referent] = {}
+        # name -> (owner node, rank); rank orders candidates as a preorder merge would
+        self._referent_info: Dict[str, Tuple[CompressedNode, Tuple[int, int]]] = {}
+        # (anaphor_type, person, number) -> gender -> name -> referent
+        self._referent_index: Dict[Tuple[AnaphorType, int, str], Dict[Optional[str], Dict[str, Referent]]] = {}
+        self._referent_serial = 0
+        self.reindex()
+
+    def reindex(self):
+        """Renumber the tree and rebuild the node_id index and the referent registry.
+        This happens on the next lookup after parent/children are assigned or a node's
+        add_referent() is called; call it yourself after editing a children list or
+        dominated_referents in place"""
+        self.root.freeze()
+        self.node_index = self.root._ids
+        self.referents = {}
+        self._referent_info = {}
+        self._referent_index = {}
+        self._referent_serial = 0
+        for node in self.root._order:
+            for referent in node.dominated_referents.values():
+                self._register_referent(node, referent)
+
+    def _refresh(self):
+        # Assigning parent/children or CompressedNode.add_referent() thaws the tree, which drops
+        # its numbering and domain caches
+        if self.root._order is None:
+            self.reindex()
+
+    def add_referent(self, node: CompressedNode, referent: Referent):
+        """Add referent to node and to the referent registry"""
+        # Bypass node.add_referent(), which would thaw the tree and force a full reindex
+        node.dominated_referents[referent.name] = referent
+        self._refresh()
+        if node._order is not self.root._order:
+            self.reindex()
+        else:
+            self._register_referent(node, referent)
+
+    def _register_referent(self, node: CompressedNode, referent: Referent):
+        name = referent.name
+        info = self._referent_info.get(name)
+        rank = (node._pre, self._referent_serial)
+        self._referent_serial += 1
+        if info is not None:
+            old_node, old_rank = info
+            rank = min(rank, old_rank)
+            if node._pre < old_node._pre:
+                # A later node in preorder keeps the name; only the candidate order may move up
+                self._referent_info[name] = (old_node, rank)
+                return
+            old = self.referents[name]
+            del self._referent_index[self._referent_key(old)][old.features.gender][name]
+        self.referents[name] = referent
+        self._referent_info[name] = (node, rank)
+        self._referent_index.setdefault(self._referent_key(referent), {}) \
+            .setdefault(referent.features.gender, {})[name] = referent
+
+    @staticmethod
+    def _referent_key(referent: Referent) -> Tuple[AnaphorType, int, str]:
+        return (referent.anaphor_type, referent.features.person, referent.features.number)
+
+    def _matching_referents(self, anaphor_types: List[AnaphorType], features: Features) -> List[Referent]:
+        """Registered referents of the given types whose features match, in preorder"""
+        matches = []
+        for anaphor_type in anaphor_types:
+            by_gender = self._referent_index.get((anaphor_type, features.person, features.number))
+            if not by_gender:
+                continue
+            if features.gender is None:
+                buckets = by_gender.values()
+            else:
+                # A referent without gender matches any gender
+                buckets = [by_gender.get(features.gender, {}), by_gender.get(None, {})]
+            for bucket in buckets:
+                matches.extend(bucket.values())
+        matches.sort(key=self._referent_rank)
+        return matches
+
+    def add_child(self, parent: CompressedNode, child: CompressedNode, position: Optional[int] = None):
+        """Attach child (and its subtree) under parent and keep the index up to date"""
+        if child.parent is not None:
+            child.parent.children.remove(child)
+        child.parent = parent
+        if position is None:
+            parent.children.append(child)
+        else:
+            parent.children.insert(position, child)
+        self.reindex()
+
+    def remove_child(self, child: CompressedNode):
+        """Detach child (and its subtree) from the tree and keep the index up to date"""
+        if child.parent is not None:
+            child.parent.children.remove(child)
+            child.parent = None
+        self.reindex()
+        child.freeze()
 
     def resolve(self, anaphor: Referent, anaphor_node: CompressedNode,
                 allow_reconstruction: bool = True) -> List[Referent]:
         """Main resolution with reconstruction support"""
+        self._refresh()
         if anaphor.anaphor_type == AnaphorType.REFLEXIVE:
             return self._resolve_reflexive(anaphor, anaphor_node, allow_reconstruction)
         elif anaphor.anaphor_type == AnaphorType.PRONOUN:
@@ -168,6 +390,176 @@ class AnaphoraResolver:
             return self._resolve_r_expression(anaphor, anaphor_node)
         return []
 
+    def resolve_all(self, allow_reconstruction: bool = True
+                    ) -> List[Tuple[CompressedNode, Referent, List[Referent]]]:
+        """Resolve every reflexive and pronoun in the tree in one preorder walk.
+
+        Returns (node, anaphor, candidates) for every reflexive and pronoun in dominated_referents,
+        in preorder, where candidates is what resolve(anaphor, node) gives, in the same order.
+        The environment is the path from the root: a binder is accessible from a frame when it
+        sits on a sister of the path node, each frame knows its nearest TP/CP and the quantifiers
+        above it, and a reflexive only scans the frames inside its local domain.
+        """
+        self._refresh()
+        order = self.root._order
+        binding_types = (AnaphorType.R_EXPRESSION, AnaphorType.QUANTIFIER)
+
+        # Pronoun binders, keyed by the node that must c-command the pronoun
+        binders: Dict[CompressedNode, List[Referent]] = {}
+        bases: Dict[CompressedNode, List[Tuple[Referent, CompressedNode]]] = {}
+        loose_binders: List[Tuple[Referent, CompressedNode, Optional[CompressedNode]]] = []
+        donkeys: List[Referent] = []
+        for ref in self.referents.values():
+            if ref.anaphor_type not in binding_types:
+                continue
+            ref_node = self._find_node_by_id(ref.node_id)
+            if ref_node is None:
+                continue
+            if (ref.anaphor_type == AnaphorType.QUANTIFIER and
+                    ref.quantifier_type == QuantifierType.EXISTENTIAL and self._is_in_restrictor(ref_node)):
+                donkeys.append(ref)
+            base_node = None
+            if ref.anaphor_type == AnaphorType.R_EXPRESSION and allow_reconstruction:
+                base_node = ref_node.get_reconstruction_site(ref)
+            if ref_node._order is not order or (base_node is not None and base_node._order is not order):
+                loose_binders.append((ref, ref_node, base_node))
+                continue
+            binders.setdefault(ref_node, []).append(ref)
+            if base_node is not None:
+                bases.setdefault(base_node, []).append((ref, ref_node))
+        donkeys.sort(key=self._referent_rank)
+
+        # Reflexive binders with their position in the holder's dominated_referents, keyed by the
+        # node that holds them when it is also their own node
+        local_binders: Dict[CompressedNode, List[Tuple[int, Referent]]] = {}
+        loose_local_binders: List[Tuple[CompressedNode, int, CompressedNode, Referent]] = []
+        for node in order:
+            for j, ref in enumerate(node.dominated_referents.values()):
+                if ref.anaphor_type not in binding_types:
+                    continue
+                ref_node = self._find_node_by_id(ref.node_id)
+                if ref_node is node:
+                    local_binders.setdefault(node, []).append((j, ref))
+                elif ref_node is not None:
+                    loose_local_binders.append((node, j, ref_node, ref))
+
+        path: List[CompressedNode] = []
+        domains: List[Optional[CompressedNode]] = []  # Nearest TP/CP at or above path[i]
+        interveners: List[Set[int]] = []  # Quantifier node_ids held at or above path[i]
+        pending: Dict[CompressedNode, List[int]] = {}  # Reconstruction site -> indexes into results
+        results: List[Tuple[CompressedNode, Referent, List[Referent]]] = []
+
+        def reflexive_candidates(anaphor: Referent) -> List[Referent]:
+            anaphor_node = path[-1]
+            local_domain = domains[-1] or anaphor_node
+            if local_domain is anaphor_node:
+                return []
+            features = anaphor.features
+            # (frame, holder preorder, position in holder, referent); resolve() walks the frames
+            # from the anaphor's grandparent out to the parent of the local domain
+            found: List[Tuple[int, int, int, Referent]] = []
+            for i in range(len(path) - 3, max(local_domain._depth - 1, 0) - 1, -1):
+                on_path = path[i + 1]
+                for sister in path[i].children:
+                    if sister is not on_path:
+                        found.extend((-i, sister._pre, j, ref) for j, ref in local_binders.get(sister, ())
+                                     if ref.features.matches(features))
+            outer = local_domain.parent or local_domain
+            inner = anaphor_node.parent
+            loose = False
+            for host, j, ref_node, ref in loose_local_binders:
+                if (ref.features.matches(features) and ref_node.c_commands(anaphor_node) and
+                        outer.dominates(host) and not inner.dominates(host) and not host.dominates(anaphor_node)):
+                    i = len(path) - 3
+                    while not path[i].dominates(host):
+                        i -= 1
+                    found.append((-i, host._pre, j, ref))
+                    loose = True
+            if loose:
+                found.sort(key=lambda entry: entry[:3])
+            return [entry[3] for entry in found]
+
+        def pronoun_candidates(anaphor: Referent) -> List[Referent]:
+            anaphor_node = path[-1]
+            local_domain = domains[-1] or anaphor_node
+            above = interveners[-2] if len(interveners) > 1 else set()
+            features = anaphor.features
+            candidates = []
+            # c_commands() lets a node command its parent, so the anaphor's own frame counts too
+            for i in range(len(path)):
+                on_path = path[i + 1] if i + 1 < len(path) else None
+                for sister in path[i].children:
+                    if sister is on_path:
+                        continue
+                    for ref in binders.get(sister, ()):
+                        if not ref.features.matches(features):
+                            continue
+                        if ref.anaphor_type == AnaphorType.QUANTIFIER:
+                            if above <= {sister.node_id}:
+                                candidates.append(ref)
+                        elif not local_domain.dominates(sister):
+                            candidates.append(ref)
+                    for ref, ref_node in bases.get(sister, ()):
+                        if (ref.features.matches(features) and not local_domain.dominates(sister) and
+                                not ref_node.c_commands(anaphor_node)):
+                            candidates.append(ref)
+            for ref, ref_node, base_node in loose_binders:
+                if not ref.features.matches(features):
+                    continue
+                if ref.anaphor_type == AnaphorType.QUANTIFIER:
+                    if self._can_bind_quantifier(ref_node, anaphor_node):
+                        candidates.append(ref)
+                elif ref_node.c_commands(anaphor_node):
+                    if not local_domain.dominates(ref_node):
+                        candidates.append(ref)
+                elif base_node is not None and base_node.c_commands(anaphor_node):
+                    if not local_domain.dominates(base_node):
+                        candidates.append(ref)
+            candidates.sort(key=self._referent_rank)
+
+            donkey_antecedents = [ref for ref in donkeys if ref.features.matches(features)]
+            self.discourse_conditions.extend((ref, anaphor) for ref in donkey_antecedents)
+            return (donkey_antecedents + candidates +
+                    [r for r in self.discourse_referents if r.features.matches(features)])
+
+        for node in order:
+            depth = node._depth
+            del path[depth:], domains[depth:], interveners[depth:]
+            path.append(node)
+            domains.append(node if node.label in ['TP', 'CP'] else (domains[-1] if domains else None))
+            above = interveners[-1] if interveners else set()
+            if len(above) < 2:
+                above = above | {ref.node_id for ref in node.dominated_referents.values()
+                                 if ref.anaphor_type == AnaphorType.QUANTIFIER}
+            interveners.append(above)
+
+            for anaphor in node.dominated_referents.values():
+                if anaphor.anaphor_type == AnaphorType.PRONOUN:
+                    results.append((node, anaphor, pronoun_candidates(anaphor)))
+                    continue
+                if anaphor.anaphor_type != AnaphorType.REFLEXIVE:
+                    continue
+                candidates = reflexive_candidates(anaphor)
+                if not candidates and allow_reconstruction:
+                    reconstruction_site = node.get_reconstruction_site(anaphor)
+                    if reconstruction_site is None or reconstruction_site is node:
+                        pass
+                    elif reconstruction_site._order is order:
+                        # The site is below node, so the walk reaches it later
+                        pending.setdefault(reconstruction_site, []).append(len(results))
+                    else:
+                        candidates = self._find_reflexive_antecedents(anaphor, reconstruction_site)
+                results.append((node, anaphor, candidates))
+
+            for index in pending.pop(node, ()):
+                host, anaphor, _ = results[index]
+                results[index] = (host, anaphor, reflexive_candidates(anaphor))
+
+        return results
+
+    def _referent_rank(self, referent: Referent) -> Tuple[int, int]:
+        return self._referent_info[referent.name][1]
+
     def _resolve_reflexive(self, anaphor: Referent, anaphor_node: CompressedNode,
                           allow_reconstruction: bool = True) -> List[Referent]:
         """Reflexive resolution with reconstruction"""
@@ -196,9 +588,7 @@ class AnaphoraResolver:
 
         current = anaphor_node.parent
         while current is not None and local_domain.dominates(current):
-            c_command_domain = current.get_c_command_domain()
-
-            for node in c_command_domain:
+            for node in current.iter_c_command_domain():
                 if node.dominates(anaphor_node):
                     continue
 
@@ -224,14 +614,8 @@ class AnaphoraResolver:
         donkey_antecedents = self._resolve_donkey_anaphora(anaphor, anaphor_node)
         candidates.extend(donkey_antecedents)
 
-        all_referents = self._collect_all_referents(self.root)
-
-        for ref_name, ref in all_referents.items():
-            if ref.anaphor_type not in [AnaphorType.R_EXPRESSION, AnaphorType.QUANTIFIER]:
-                continue
-            if not ref.features.matches(anaphor.features):
-                continue
-
+        for ref in self._matching_referents([AnaphorType.R_EXPRESSION, AnaphorType.QUANTIFIER],
+                                            anaphor.features):
             ref_node = self._find_node_by_id(ref.node_id)
             if not ref_node:
                 continue
@@ -269,19 +653,14 @@ class AnaphoraResolver:
         candidates = []
 
         # Look for existential quantifier in restrictor of universal quantifier
-        all_referents = self._collect_all_referents(self.root)
-
-        for ref_name, ref in all_referents.items():
-            if ref.anaphor_type == AnaphorType.QUANTIFIER:
-                if ref.quantifier_type == QuantifierType.EXISTENTIAL:
-                    # Check if this existential is in a relative clause/restrictor
-                    ref_node = self._find_node_by_id(ref.node_id)
-                    if ref_node and self._is_in_restrictor(ref_node):
-                        # Check if features match
-                        if ref.features.matches(anaphor.features):
-                            # Store this as a discourse condition
-                            self.discourse_conditions.append((ref, anaphor))
-                            candidates.append(ref)
+        for ref in self._matching_referents([AnaphorType.QUANTIFIER], anaphor.features):
+            if ref.quantifier_type == QuantifierType.EXISTENTIAL:
+                # Check if this existential is in a relative clause/restrictor
+                ref_node = self._find_node_by_id(ref.node_id)
+                if ref_node and self._is_in_restrictor(ref_node):
+                    # Store this as a discourse condition
+                    self.discourse_conditions.append((ref, anaphor))
+                    candidates.append(ref)
 
         return candidates
 
@@ -407,25 +786,31 @@ class AnaphoraResolver:
         moved_element.base_position = from_node.node_id
         moved_element.trace_of = to_node.node_id
 
-        return trace
+        # Either position may have been created after the resolver was built
+        self._refresh()
+        self.node_index.setdefault(from_node.node_id, from_node)
+        self.node_index.setdefault(to_node.node_id, to_node)
 
-    def _collect_all_referents(self, node: CompressedNode) -> Dict[str, Referent]:
-        all_refs = dict(node.dominated_referents)
-        for child in node.children:
-            all_refs.update(self._collect_all_referents(child))
-        return all_refs
+        return trace
 
     def _find_node_by_id(self, node_id: int) -> Optional[CompressedNode]:
-        return self._find_node_by_id_helper(self.root, node_id)
+        self._refresh()
+        node = self.node_index.get(node_id)
+        if node is None:
+            # A children list was edited in place without reindex()
+            node = self._find_node_by_id_helper(self.root, node_id)
+            if node is not None:
+                self.node_index[node_id] = node
+        return node
 
     def _find_node_by_id_helper(self, node: CompressedNode,
                                target_id: int) -> Optional[CompressedNode]:
-        if node.node_id == target_id:
-            return node
-        for child in node.children:
-            result = self._find_node_by_id_helper(child, target_id)
-            if result:
-                return result
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.node_id == target_id:
+                return current
+            stack.extend(reversed(current.children))
         return None
 
 
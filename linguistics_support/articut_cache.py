@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+from hashlib import sha256
+from threading import Lock
+import json
+import os
+import sqlite3
+import time
+
+try:
+    from importlib.metadata import version as packageVersion
+    ARTICUT_VERSION = packageVersion("ArticutAPI")
+except Exception:
+    ARTICUT_VERSION = ""
+
+class ArticutCache:
+    """
+    包住一個 Articut 物件的硬碟快取 (SQLite)。
+
+    快取鍵為下列內容的 sha256：
+        句子、userDefinedDictFILE 的檔案內容、ArticutAPI 版本、Articut 的 url、斷詞引擎版本 (articut.version)、
+        帳號 (articut.username)，以及 parse() 的其它參數。level 沒有指定時與 Articut.parse() 相同，以 articut.level 代入。
+    使用者自定詞典的內容每次都重新讀取，所以詞典被改寫後 (例如 TransformationalGrammar.makeQ() 會改寫 ud.json)
+    自然會對到新的鍵，不會讀到舊結果。
+
+    只快取 status 為 True 的結果。超過 maxEntryINT 筆時依最近使用時間淘汰 (LRU)。
+    命中時的使用時間先記在記憶體，累積 accessFlushINT 筆、寫入新結果、淘汰或 close() 時才一起寫回，
+    所以命中快取不會每次都寫檔。
+    可在多個執行緒間共用 (bbtree_batch() 會並行呼叫 parse())。
+    """
+    def __init__(self, articut, cacheFILE, maxEntryINT=100000, versionSTR=None, accessFlushINT=256):
+        """
+        input:
+        articut: ArticutAPI.Articut 物件
+        cacheFILE: SQLite 檔案路徑
+        maxEntryINT: 快取筆數上限
+        versionSTR: 放進快取鍵的 Articut 版本，預設為已安裝的 ArticutAPI 版本
+        accessFlushINT: 累積多少筆命中的使用時間後寫回檔案
+        """
+        self.articut = articut
+        self.cacheFILE = cacheFILE
+        self.maxEntryINT = maxEntryINT
+        self.versionSTR = ARTICUT_VERSION if versionSTR is None else versionSTR
+        self.accessFlushINT = accessFlushINT
+        self.accessDICT = {}
+        self.hitINT = 0
+        self.missINT = 0
+        self.lock = Lock()
+
+        cacheDIR = os.path.dirname(os.path.abspath(cacheFILE))
+        os.makedirs(cacheDIR, exist_ok=True)
+        self.db = sqlite3.connect(cacheFILE, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS articut (key TEXT PRIMARY KEY, result TEXT NOT NULL, access INTEGER NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS articut_access ON articut (access)")
+        self.db.commit()
+
+    def makeKey(self, inputSTR, userDefinedDictFILE=None, **kwargs):
+        userDefinedBYTES = b""
+        if userDefinedDictFILE:
+            try:
+                with open(userDefinedDictFILE, "rb") as f:
+                    userDefinedBYTES = f.read()
+            except OSError:
+                pass
+
+        keyDICT = {
+            "input": inputSTR,
+            "user_defined": sha256(userDefinedBYTES).hexdigest(),
+            "version": self.versionSTR,
+            "url": getattr(self.articut, "url", ""),
+            "engine_version": getattr(self.articut, "version", ""),
+            "username": getattr(self.articut, "username", ""),
+            "kwargs": kwargs
+        }
+        return sha256(json.dumps(keyDICT, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def parse(self, inputSTR, level="", userDefinedDictFILE=None, chemicalBOOL=True, emojiBOOL=True,
+              openDataPlaceAccessBOOL=False, wikiDataBOOL=False, indexWithPOS=False, timeRef=None,
+              pinyin="BOPOMOFO", autoBreakBOOL=True, requestID=""):
+        """
+        參數與 Articut.parse() 相同 (requestID 不列入快取鍵)。命中快取時不會送出任何網路請求。
+        """
+        # 與 Articut.parse() 相同：不是 lv1/lv2/lv3 時改用 Articut 物件的 level；否則預設 level 不同的 Articut 會共用同一個鍵
+        if level.lower() not in ("lv1", "lv2", "lv3"):
+            level = getattr(self.articut, "level", level)
+        optionDICT = {
+            "level": level,
+            "chemicalBOOL": chemicalBOOL,
+            "emojiBOOL": emojiBOOL,
+            "openDataPlaceAccessBOOL": openDataPlaceAccessBOOL,
+            "wikiDataBOOL": wikiDataBOOL,
+            "indexWithPOS": indexWithPOS,
+            "timeRef": timeRef,
+            "pinyin": pinyin,
+            "autoBreakBOOL": autoBreakBOOL
+        }
+        keySTR = self.makeKey(inputSTR, userDefinedDictFILE, **optionDICT)
+        with self.lock:
+            row = self.db.execute("SELECT result FROM articut WHERE key = ?", (keySTR,)).fetchone()
+            if row:
+                self.hitINT += 1
+                self.accessDICT[keySTR] = time.time_ns()
+                if len(self.accessDICT) >= self.accessFlushINT:
+                    self._flushAccess()
+                    self.db.commit()
+                return json.loads(row[0])
+            self.missINT += 1
+
+        resultDICT = self.articut.parse(inputSTR, userDefinedDictFILE=userDefinedDictFILE, requestID=requestID, **optionDICT)
+
+        if resultDICT.get("status"):
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO articut (key, result, access) VALUES (?, ?, ?)",
+                                (keySTR, json.dumps(resultDICT, ensure_ascii=False), time.time_ns()))
+                self._flushAccess()
+                self._evict()
+                self.db.commit()
+        return resultDICT
+
+    def _flushAccess(self):
+        # 呼叫者需持有 self.lock 並負責 commit()
+        if self.accessDICT:
+            self.db.executemany("UPDATE articut SET access = ? WHERE key = ?",
+                                [(accessINT, keySTR) for keySTR, accessINT in self.accessDICT.items()])
+            self.accessDICT.clear()
+
+    def flush(self):
+        """
+        把記憶體中累積的使用時間寫回檔案。
+        """
+        with self.lock:
+            self._flushAccess()
+            self.db.commit()
+
+    def _evict(self):
+        countINT = self.db.execute("SELECT COUNT(*) FROM articut").fetchone()[0]
+        if countINT > self.maxEntryINT:
+            self.db.execute("DELETE FROM articut WHERE key IN (SELECT key FROM articut ORDER BY access LIMIT ?)",
+                            (countINT - self.maxEntryINT,))
+
+    def getStats(self):
+        with self.lock:
+            sizeINT = self.db.execute("SELECT COUNT(*) FROM articut").fetchone()[0]
+        return {"hit": self.hitINT, "miss": self.missINT, "size": sizeINT, "max": self.maxEntryINT}
+
+    def clear(self):
+        with self.lock:
+            self.accessDICT.clear()
+            self.db.execute("DELETE FROM articut")
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self._flushAccess()
+            self.db.commit()
+            self.db.close()
+
+    def __getattr__(self, name):
+        # 其它 Articut 方法 (例如 getVerbStemLIST()) 直接交給原本的物件
+        return getattr(self.articut, name)
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def makeSession(poolSizeINT=10, retryINT=3, backoffFLOAT=0.5, idempotent=True):
+    """
+    建立共用的 requests.Session：連線保持 keep-alive，並以指數退避 (backoffFLOAT * 2^(n-1) 秒) 重試。
+
+    idempotent 為 True：請求可以安全地重送 (例如 Loki 查詢)。連線錯誤、讀取錯誤與 5xx 都會重試，POST 也一樣。
+    idempotent 為 False：請求會改變伺服器狀態 (例如建立專案、新增語句)。只在連線建立失敗時重試
+    (此時請求一定沒有送達)；讀取錯誤與 5xx 不重試，避免伺服器重複建立。
+    """
+    if idempotent:
+        retry = Retry(total=retryINT, connect=retryINT, read=retryINT, status=retryINT,
+                      backoff_factor=backoffFLOAT, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=None, raise_on_status=False)
+    else:
+        retry = Retry(total=retryINT, connect=retryINT, read=False, status=0, other=0,
+                      backoff_factor=backoffFLOAT, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=poolSizeINT, pool_maxsize=poolSizeINT, max_retries=retry)
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -11,8 +11,13 @@ import re
 from discord.ui import dynamic
 from pandas.core.reshape import encoding
 
+try:
+    from .articut_cache import ArticutCache
+except ImportError:
+    from articut_cache import ArticutCache
+
 class TransformationalGrammar:
-    def __init__(self, username="", apikey="", lang="tw", llmkey="", online=False):
+    def __init__(self, username="", apikey="", lang="tw", llmkey="", online=False, cacheFILE=""):
         self.username = username
         self.apikey = apikey
         self.llmkey = llmkey
@@ -35,6 +40,9 @@ class TransformationalGrammar:
         elif self.lang == "en":
             self.url="https://nlu.droidtown.co"
         self.articut = Articut(username=self.username, apikey=self.apikey, url=self.url)
+        # 指定 cacheFILE 才使用硬碟快取 (預設不使用)
+        if cacheFILE:
+            self.articut = ArticutCache(self.articut, cacheFILE=cacheFILE)
 
         self.QDICT = {"who"  :[],
                       "what" :[],
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+from threading import Lock
+from time import perf_counter_ns
+
+class Timer:
+    """
+    收集每個 @timed 函式的執行時間 (ns)。
+    每個函式記錄呼叫次數、總時間、最短/最長時間，以及以 2 的次方 (ns) 分桶的直方圖：
+    第 k 桶計數的是 2**(k-1) <= 時間 < 2**k ns 的呼叫。
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.statDICT = {}
+
+    def record(self, nameSTR, elapsedINT):
+        bucketINT = elapsedINT.bit_length()
+        with self.lock:
+            statLIST = self.statDICT.get(nameSTR)
+            if statLIST is None:
+                # [count, total, min, max, histogram]
+                statLIST = self.statDICT[nameSTR] = [0, 0, elapsedINT, elapsedINT, {}]
+            statLIST[0] += 1
+            statLIST[1] += elapsedINT
+            if elapsedINT < statLIST[2]:
+                statLIST[2] = elapsedINT
+            if elapsedINT > statLIST[3]:
+                statLIST[3] = elapsedINT
+            statLIST[4][bucketINT] = statLIST[4].get(bucketINT, 0) + 1
+
+    def getStats(self):
+        """
+        return: {函式名稱: {"count", "total_ns", "min_ns", "max_ns", "mean_ns", "histogram": {桶的上限 (ns): 次數}}}
+        """
+        with self.lock:
+            return {
+                nameSTR: {
+                    "count": countINT,
+                    "total_ns": totalINT,
+                    "min_ns": minINT,
+                    "max_ns": maxINT,
+                    "mean_ns": totalINT / countINT,
+                    "histogram": {2 ** k: histogramDICT[k] for k in sorted(histogramDICT)}
+                }
+                for nameSTR, (countINT, totalINT, minINT, maxINT, histogramDICT) in self.statDICT.items()
+            }
+
+    def clear(self):
+        with self.lock:
+            self.statDICT.clear()
+
+# 預設不計時：@timed 函式只多一次全域變數的判斷，直接回傳結果
+currentTimer = None
+
+def getTimer():
+    return currentTimer
+
+def setTimer(timer):
+    """
+    設定 @timed 函式要回報的 Timer；傳入 None 則關閉計時。回傳原本的 Timer。
+    """
+    global currentTimer
+    previousTimer = currentTimer
+    currentTimer = timer
+    return previousTimer
+
+@contextmanager
+def timing(timer=None):
+    """
+    with timing() as timer:
+        treeMaker("w1w2w3")
+    print(timer.getStats())
+    """
+    if timer is None:
+        timer = Timer()
+    previousTimer = setTimer(timer)
+    try:
+        yield timer
+    finally:
+        setTimer(previousTimer)
+
+def timed(func):
+    """
+    只在有 Timer 時才以 perf_counter_ns() 計時的裝飾器。
+    被裝飾的函式多一個 withTime() 方法，回傳 (result, timedelta)，供需要單次耗時的呼叫者使用。
+    """
+    nameSTR = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = currentTimer
+        if timer is None:
+            return func(*args, **kwargs)
+        startINT = perf_counter_ns()
+        result = func(*args, **kwargs)
+        timer.record(nameSTR, perf_counter_ns() - startINT)
+        return result
+
+    def withTime(*args, **kwargs):
+        startINT = perf_counter_ns()
+        result = wrapper(*args, **kwargs)
+        return result, timedelta(microseconds=(perf_counter_ns() - startINT) / 1000)
+
+    wrapper.withTime = withTime
+    return wrapper
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+from linguistics_support.articut_cache import ArticutCache
+
+class FakeArticut:
+    def __init__(self, username="", version="latest", level="lv2"):
+        self.username = username
+        self.version = version
+        self.level = level
+        self.url = "https://api.droidtown.co"
+        self.callLIST = []
+
+    def parse(self, inputSTR, level="", **kwargs):
+        self.callLIST.append((inputSTR, level))
+        return {"status": True, "result_pos": [f"{level}:{self.username}:{self.version}:{inputSTR}"]}
+
+def test_default_level_resolves_to_articut_level(tmp_path):
+    articut = FakeArticut(level="lv3")
+    cache = ArticutCache(articut, cacheFILE=str(tmp_path / "articut.db"))
+    assert cache.parse("女孩坐在椅子上") == cache.parse("女孩坐在椅子上", level="lv3")
+    assert articut.callLIST == [("女孩坐在椅子上", "lv3")]
+    cache.close()
+
+def test_key_includes_level_engine_version_and_username(tmp_path):
+    cacheFILE = str(tmp_path / "articut.db")
+    resultLIST = []
+    for articut in (FakeArticut(), FakeArticut(level="lv1"), FakeArticut(version="v250"), FakeArticut(username="a@b.c")):
+        cache = ArticutCache(articut, cacheFILE=cacheFILE)
+        resultLIST.append(cache.parse("女孩")["result_pos"][0])
+        assert len(articut.callLIST) == 1
+        cache.close()
+    assert len(set(resultLIST)) == 4
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+import io
+
+import pytest
+
+import Bonsai
+
+# 以固定詞表模擬 Articut 的斷詞結果
+LEXICON = {"女孩": "ENTITY_noun", "男孩": "ENTITY_noun", "椅子": "ENTITY_noun", "學校": "ENTITY_noun",
+           "坐": "ACTION_verb", "看": "ACTION_verb", "在": "FUNC_inner", "的": "FUNC_inner", "很": "MODIFIER"}
+
+def fakeTokenize(inputSTR):
+    tokenLIST = []
+    i = 0
+    while i < len(inputSTR):
+        wordSTR = next((w for w in sorted(LEXICON, key=len, reverse=True) if inputSTR.startswith(w, i)), inputSTR[i])
+        tokenLIST.append(f"<{LEXICON.get(wordSTR, 'UNKNOWN')}>{wordSTR}</{LEXICON.get(wordSTR, 'UNKNOWN')}>")
+        i += len(wordSTR)
+    return tokenLIST
+
+class FakeArticut:
+    def parse(self, inputSTR, **kwargs):
+        return {"result_pos": ["".join(fakeTokenize(inputSTR))]}
+
+def fakeHeads(inputSTR):
+    # 名詞前面若有其他成分，就以該名詞為 head_final
+    return [f"<{LEXICON[w]}>" for w in LEXICON if LEXICON[w] == "ENTITY_noun" and inputSTR.find(w) > 0]
+
+def fakeAskLokiMerge(content, refDICT={}, filterLIST=[], **kwargs):
+    resultDICT = {k: list(v) for k, v in refDICT.items()}
+    for inputSTR in ([content] if type(content) == str else content):
+        headLIST = fakeHeads(inputSTR)
+        resultDICT["final"].extend(headLIST)
+        if "final_input" in resultDICT:
+            resultDICT["final_input"].extend([inputSTR] * len(headLIST))
+    return resultDICT
+
+@pytest.fixture
+def fakeNLU(monkeypatch):
+    monkeypatch.setattr(Bonsai, "getArticut", lambda: FakeArticut())
+    monkeypatch.setattr(Bonsai, "askLokiMerge", fakeAskLokiMerge)
+
+def test_bbtree_batch_matches_bbtree(fakeNLU):
+    # 彼此共用子字串的句子：head 不能被對到另一句
+    inputLIST = ["女孩坐在椅子", "女孩", "坐在椅子", "男孩看女孩", "看", "男孩看女孩", "很", "學校的女孩坐在椅子"]
+    assert Bonsai.bbtree_batch(inputLIST) == [Bonsai.bbtree(inputSTR) for inputSTR in inputLIST]
+
+def test_bbtree_batch_empty(fakeNLU):
+    assert Bonsai.bbtree_batch([]) == []
+
+def test_getHeadLIST_does_not_match_substrings():
+    inputLIST = ["女孩", "坐在女孩"]
+    assert Bonsai.getHeadLIST(inputLIST, ["坐在女孩"], ["<ENTITY_noun>"]) == [[], ["<ENTITY_noun>"]]
+
+def test_treeindex_ccommands_is_irreflexive_unlike_ccommandWithTree():
+    treeDICT = Bonsai.treeMaker("w1w2w3w4")
+    index = Bonsai.TreeIndex(treeDICT)
+    for w in ("w1", "w2", "w3", "w4"):
+        assert Bonsai.ccommandWithTree(treeDICT, w, w) is True
+        assert index.ccommands(w, w) is False
+    # 不同的字之間兩者一致
+    for a in ("w1", "w2", "w3", "w4"):
+        for b in ("w1", "w2", "w3", "w4"):
+            if a != b:
+                assert index.ccommands(a, b) == Bonsai.ccommandWithTree(treeDICT, a, b)
+
+@pytest.mark.parametrize("inputOBJ", [
+    "((<A>a</A>, <B>b</B>), (<C>c</C>, <D>d</D>))",
+    "(((<A>a</A>, <B>b</B>), (<C>c</C>, <D>d</D>)), (<E>e</E>, <F>f</F>))",
+    ["(<A>a</A>, <B>b</B>)", "<C>c</C>", "((<D>d</D>, <E>e</E>), <F>f</F>)"],
+])
+def test_ccommandMatrix_algMask_matches_treeDICT(inputOBJ):
+    pytest.importorskip("numpy")
+    parsedTree = Bonsai.parseBracket(inputOBJ)
+    algMatrix, algNodeLIST = Bonsai.ccommandMatrix(parsedTree.algMask)
+    treeMatrix, treeNodeLIST = Bonsai.ccommandMatrix(parsedTree.treeDICT)
+    assert algNodeLIST == treeNodeLIST == list(parsedTree.wordDICT)
+    assert (algMatrix == treeMatrix).all()
+
+@pytest.mark.parametrize("inputSTR", [
+    "(x<ENTITY_oov>a, b (c)</ENTITY_oov>, <ACTION_verb>d</ACTION_verb>)",
+    "((<ENTITY_noun>y</ENTITY_noun>, x<ENTITY_oov>a, b (c)</ENTITY_oov>), <ACTION_verb>d</ACTION_verb>)",
+])
+@pytest.mark.parametrize("chunkSizeINT", [1, 5, 65536])
+def test_purgeBracket_raw_text_before_tagged_leaf(inputSTR, chunkSizeINT):
+    assert "".join(Bonsai.purgeBracket(io.StringIO(inputSTR), chunkSizeINT=chunkSizeINT)) == Bonsai.purgePAT.sub("", inputSTR)
+
+def test_purgeBracket_extra_close_does_not_raise():
+    assert "".join(Bonsai.purgeBracket("(<A>a</A>)), <B>b</B>)")) == "(a))b)"
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+
+import Loki_Model.Bonsai.Bonsai as LokiBonsai
+
+def test_loki_cache_reads_settings_on_first_use(monkeypatch, tmp_path):
+    monkeypatch.setattr(LokiBonsai, "lokiCache", None)
+    monkeypatch.setattr(LokiBonsai, "LOKI_CACHE_SIZE", 5)
+    monkeypatch.setattr(LokiBonsai, "LOKI_CACHE_FILE", str(tmp_path / "loki.db"))
+    monkeypatch.setattr(LokiBonsai, "LOKI_CACHE_TTL", 7)
+    lokiCache = LokiBonsai.getLokiCache()
+    assert (lokiCache.sizeINT, lokiCache.ttlINT) == (5, 7)
+    assert lokiCache.db is not None
+    assert LokiBonsai.getLokiCache() is lokiCache
+    lokiCache.db.close()
+
+def test_aexecLoki_waits_for_cancelled_chunks(monkeypatch):
+    import asyncio
+    finishedLIST = []
+
+    async def fakeAgetLokiResultLIST(inputLIST, filterLIST=[], refDICT={}, session=None):
+        try:
+            if inputLIST == ["a"]:
+                return None, "failed"
+            await asyncio.sleep(60)
+        finally:
+            finishedLIST.append(inputLIST[0])
+
+    monkeypatch.setattr(LokiBonsai, "agetLokiResultLIST", fakeAgetLokiResultLIST)
+    monkeypatch.setattr(LokiBonsai, "INPUT_LIMIT", 1)
+    async def main():
+        resultDICT = await LokiBonsai.aexecLoki(["a", "b", "c"], workerINT=3, session=object())
+        # aexecLoki() 回傳時，被取消的批次必須已經結束
+        return resultDICT, sorted(finishedLIST)
+
+    resultDICT, finishedLIST = asyncio.run(main())
+    assert resultDICT["msg"] == "failed"
+    assert finishedLIST == ["a", "b", "c"]
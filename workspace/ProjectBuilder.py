@@ -1,13 +1,30 @@
 #!/usr/bin/env python3
 # -*- coding:utf-8 -*-
 
-from requests import post
 from pprint import pprint
 import json
+import os
+import sys
+
+try:
+    from linguistics_support.http_session import makeSession
+except ImportError:
+    # 在 workspace 目錄執行時，從 repo 根目錄載入共用的 linguistics_support
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from linguistics_support.http_session import makeSession
 accountDICT = json.load(open("account.info", encoding="utf-8"))
 
 lokiurl = "https://api.droidtown.co/Loki/Call/"  #線上版 URL
 
+# HTTP 連線設定：keep-alive 連線數、連線錯誤的重試次數與退避秒數、(連線, 讀取) 逾時秒數
+HTTP_POOL_SIZE = 4
+HTTP_RETRY = 3
+HTTP_BACKOFF = 0.5
+HTTP_TIMEOUT = (5, 60)
+
+# create_project / insert_utterance 會改變伺服器狀態：只在連線建立失敗時重試，避免重複建立
+lokiSession = makeSession(poolSizeINT=HTTP_POOL_SIZE, retryINT=HTTP_RETRY, backoffFLOAT=HTTP_BACKOFF, idempotent=False)
+
 def createLokiProject(accountDICT, projectSTR=""):
     if projectSTR == "":
         response = {"status":"false",
@@ -22,7 +39,7 @@ def createLokiProject(accountDICT, projectSTR=""):
                 "type": "intent"
             }
         }
-        response = post(lokiurl, json=payload).json()
+        response = lokiSession.post(lokiurl, json=payload, timeout=HTTP_TIMEOUT).json()
     return response
 
 def insertLokiUtterance(accountDICT, projectSTR="", intentSTR="", utteranceLIST=[]):
@@ -52,7 +69,7 @@ def insertLokiUtterance(accountDICT, projectSTR="", intentSTR="", utteranceLIST=
         }
     }
 
-    response = post(lokiurl, json=payload).json()
+    response = lokiSession.post(lokiurl, json=payload, timeout=HTTP_TIMEOUT).json()
     return response
 
 if __name__ == "__main__":
@@ -65,6 +82,7 @@ if __name__ == "__main__":
     createLokiProject(accountDICT, projectSTR=projectSTR)
     if IMPORT_MODE == True:
         #importLokiProjet(accountDICT, projectSTR=projectSTR, refLIST)
+        pass
     else:
         LokiCall
 